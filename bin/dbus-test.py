@@ -33,7 +33,6 @@ import logging
 import signal
 import sys
 
-from dbus.mainloop.pyqt5 import DBusQtMainLoop # pylint: disable=import-error
 from PyQt5.QtCore import QCoreApplication, QTimer
 
 import pes.system
@@ -49,8 +48,6 @@ if __name__ == "__main__":
     logLevel = logging.DEBUG
     logging.basicConfig(format='%(asctime)s:%(levelname)s: %(message)s', datefmt='%Y/%m/%d %H:%M:%S', level=logLevel)
 
-    DBusQtMainLoop(set_as_default=True)
-
     app = QCoreApplication(sys.argv)
     broker = pes.system.DbusBroker()
 
@@ -65,7 +62,7 @@ if __name__ == "__main__":
         logging.info("TZ = %s", t)
 
     if broker.btAvailable():
-        agent = pes.system.BluetoothAgent()
+        agent = pes.system.BluetoothAgent(broker)
         #logging.info("Adapter: %s", broker.btAdapter)
         logging.info("Powered: %s", broker.btPowered)
         logging.info("Discoverable: %s", broker.btDiscoverable)
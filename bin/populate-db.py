@@ -175,6 +175,7 @@ def processGamesDbImageJson(newDb: bool, cacheDir: str):
                         data = json.load(f)["data"]
                     except Exception as e:
                         pesExit(f"Failed to load JSON from {jsonPath} due to:\n{e}")
+                    screenshots = []
                     for gameId, images in data["images"].items():
                         # look up game
                         gameId = int(gameId)
@@ -189,13 +190,13 @@ def processGamesDbImageJson(newDb: bool, cacheDir: str):
                                 gamesDbGame.boxArtBackLarge = f"{data['base_url']['large']}{image['filename']}"
                                 session.add(gamesDbGame)
                             if image["type"] == "screenshot":
-                                screenshot = pes.sql.GamesDbScreenshot(
-                                    gameId=gameId,
-                                    original=f"{data['base_url']['original']}{image['filename']}",
-                                    medium=f"{data['base_url']['medium']}{image['filename']}",
-                                    large=f"{data['base_url']['large']}{image['filename']}"
-                                )
-                                session.add(screenshot)
+                                screenshots.append({
+                                    "gameId": gameId,
+                                    "original": f"{data['base_url']['original']}{image['filename']}",
+                                    "medium": f"{data['base_url']['medium']}{image['filename']}",
+                                    "large": f"{data['base_url']['large']}{image['filename']}"
+                                })
+                    pes.sql.GamesDbScreenshot.bulkInsert(session, screenshots)
 
             elif not newRequest:
                 logging.debug("finished processing batch: %d", requestNumber)
@@ -207,8 +208,9 @@ def processGamesDbImageJson(newDb: bool, cacheDir: str):
                 break
             page += 1
 
-def processRetroAchievementsJson(newDb: bool, gameHashes: dict, consoleRetroId: int):
+def processRetroAchievementsJson(gameHashes: dict, consoleRetroId: int):
     with pes.sql.Session.begin() as session:
+        hashes = []
         # note: a game may appear in more than one hash file
         for gameId, data in gameHashes.items():
             logging.info("processing RetroGame: %s", data["name"])
@@ -219,17 +221,12 @@ def processRetroAchievementsJson(newDb: bool, gameHashes: dict, consoleRetroId:
             else:
                 logging.info("-> adding")
                 retroGame = pes.sql.RetroAchievementGame(id=gameId, name=data["name"], retroConsoleId=consoleRetroId)
-            retroGameHash = None
             for h in data['hashes']:
-                if not newDb:
-                    retroGameHash = session.query(pes.sql.RetroAchievementGameHash).get((gameId, h))
-                if not retroGameHash:
-                    logging.info("-> adding hash: %s", h)
-                    retroGameHash = pes.sql.RetroAchievementGameHash(id=gameId, rasum=h)
-                    session.add(retroGameHash)
-                else:
-                    logging.info("-> skipping hash: %s", h)
+                logging.info("-> hash: %s", h)
+                hashes.append({ "id": gameId, "rasum": h })
             session.add(retroGame)
+        # existing hashes are skipped by the database
+        pes.sql.RetroAchievementGameHash.upsertMany(session, hashes)
 
 if __name__ == "__main__":
 
@@ -501,7 +498,7 @@ if __name__ == "__main__":
                         gameHashes = json.load(f)
                     except Exception as e:
                         pesExit(f"Failed to load JSON from {jsonPath} due to:\n{e}")
-                processRetroAchievementsJson(newDb, gameHashes, retroConsole.id)
+                processRetroAchievementsJson(gameHashes, retroConsole.id)
 
     if args.retroachievements:
         logging.info("updating RetroAchievement records")
@@ -521,13 +518,13 @@ if __name__ == "__main__":
                 logging.info("saving game hashes to: %s", jsonPath)
                 with open(jsonPath, "w", encoding="utf-8") as f:
                     f.write(json.dumps(gameHashes))
-                processRetroAchievementsJson(newDb, gameHashes, retroConsole.id)
+                processRetroAchievementsJson(gameHashes, retroConsole.id)
 
     if args.match:
         logging.info("matching up theGamesDb records with RetroAchievements records")
         with pes.sql.Session.begin() as session:
             i = 0
-            for console in session.query(pes.sql.Console).join(pes.sql.GamesDbPlatform).filter(pes.sql.Console.retroId != 0):
+            for console in session.query(pes.sql.Console).join(pes.sql.GamesDbPlatform).filter(pes.sql.Console.retroId != 0).options(*pes.sql.CONSOLE_PLATFORM_OPTIONS):
                 logging.info("processing console: %s", console.platform.name)
                 for gamesDbGame in console.platform.games:
                     for retroGame in session.query(pes.sql.RetroAchievementGame).filter(
@@ -39,31 +39,31 @@ romScrapers = ['theGamesDb.net'] # list of ROM scrapers, default scraper is assu
 
 moduleDir = os.path.dirname(os.path.realpath(__file__))
 baseDir = os.path.abspath(f'{moduleDir}/../../')
-confDir = os.path.join(moduleDir, 'conf.d')
-qmlDir = os.path.join(moduleDir, 'qml')
-qmlMain = os.path.join(qmlDir, 'main.qml')
-webDir = os.path.join(moduleDir, 'web')
-dataDir = os.path.join(moduleDir, 'data')
-imagesDir = os.path.join(qmlDir, 'images')
-primaryDb = os.path.join(dataDir, 'pes.db')
+confDir = f'{moduleDir}/conf.d'
+qmlDir = f'{moduleDir}/qml'
+qmlMain = f'{qmlDir}/main.qml'
+webDir = f'{moduleDir}/web'
+dataDir = f'{moduleDir}/data'
+imagesDir = f'{qmlDir}/images'
+primaryDb = f'{dataDir}/pes.db'
 userHomeDir = os.path.expanduser('~')
-userDir = os.path.join(userHomeDir, 'pes')
-userDb = os.path.join(userDir, 'pes.db')
-userBiosDir = os.path.join(userDir, 'BIOS')
-userLogDir = os.path.join(userDir, 'log')
-userConfDir = os.path.join(userDir, 'conf.d')
-userBadgeDir = os.path.join(userDir, 'badges')
-userCoverartDir = os.path.join(userDir, 'coverart')
-userScreenshotDir = os.path.join(userDir, 'screenshots')
-userRomDir = os.path.join(userDir, 'roms')
-userRetroArchConfDir = os.path.join(userConfDir, 'retroarch')
-userRetroArchJoysticksConfDir = os.path.join(userRetroArchConfDir, 'joysticks')
-userRetroArchRguiConfDir = os.path.join(userRetroArchConfDir, 'config')
-userRetroArchCheevosConfFile = os.path.join(userRetroArchConfDir, 'cheevos.cfg')
-userPesConfDir = os.path.join(userConfDir, 'pes')
-userPesConfigFile = os.path.join(userPesConfDir, 'pes.ini')
-userConsolesConfigFile = os.path.join(userPesConfDir, 'consoles.ini')
-userGameControllerFile = os.path.join(userPesConfDir, 'gamecontrollerdb.txt')
-userScriptFile = os.path.join(userDir, 'commands.sh')
+userDir = f'{userHomeDir}/pes'
+userDb = f'{userDir}/pes.db'
+userBiosDir = f'{userDir}/BIOS'
+userLogDir = f'{userDir}/log'
+userConfDir = f'{userDir}/conf.d'
+userBadgeDir = f'{userDir}/badges'
+userCoverartDir = f'{userDir}/coverart'
+userScreenshotDir = f'{userDir}/screenshots'
+userRomDir = f'{userDir}/roms'
+userRetroArchConfDir = f'{userConfDir}/retroarch'
+userRetroArchJoysticksConfDir = f'{userRetroArchConfDir}/joysticks'
+userRetroArchRguiConfDir = f'{userRetroArchConfDir}/config'
+userRetroArchCheevosConfFile = f'{userRetroArchConfDir}/cheevos.cfg'
+userPesConfDir = f'{userConfDir}/pes'
+userPesConfigFile = f'{userPesConfDir}/pes.ini'
+userConsolesConfigFile = f'{userPesConfDir}/consoles.ini'
+userGameControllerFile = f'{userPesConfDir}/gamecontrollerdb.txt'
+userScriptFile = f'{userDir}/commands.sh'
 cecEnabled = False
 screenSaverTimeout = 0
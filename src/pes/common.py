@@ -28,21 +28,30 @@ This module provides the "common" functions and classes required by PES.
 
 # standard imports
 import configparser
-import csv
 import fcntl
 import logging
 import os
+import re
 import shlex
 import shutil
 import socket
 import subprocess
 import sys
-import struct
+import time
 from typing import NoReturn
 
 # pes imports
 from pes import baseDir, confDir, moduleDir, primaryDb, userBiosDir, userConfDir, userConsolesConfigFile, userDb, userDir, userPesConfigFile
 
+# variables that may be used in consoles.ini values
+_CONSOLE_VARIABLES = {
+    "USERDIR": userDir,
+    "BASE": baseDir,
+    "USERBIOSDIR": userBiosDir,
+    "USERCONFDIR": userConfDir
+}
+_CONSOLE_VARIABLE_RE = re.compile(r"%%(USERDIR|BASE|USERBIOSDIR|USERCONFDIR)%%")
+
 def checkDir(d: str):
     logging.debug("checking for: %s", d)
     if not os.path.exists(d):
@@ -56,35 +65,74 @@ def checkFile(f: str):
     if not os.path.isfile(f):
         pesExit(f"Error: {f} is not a file!", True)
 
+# the GUI polls the network status, so look ups are cached for this
+# many seconds
+_NETWORK_CACHE_TTL = 5
+_defaultInterface = (0.0, None) # (expiry time, interface)
+_ipAddresses = {} # interface -> (expiry time, address)
+_ipSocket = None
+_ipRequest = bytearray(256) # struct ifreq buffer reused for SIOCGIFADDR
+
 def getDefaultInterface() -> str:
-    with open('/proc/net/route', 'r') as f: # pylint: disable=unspecified-encoding
-        for i in csv.DictReader(f, delimiter="\t"):
-            if int(i['Destination'], 16) == 0:
-                return i['Iface']
-    return None
+    global _defaultInterface # pylint: disable=global-statement
+    now = time.monotonic()
+    expires, iface = _defaultInterface
+    if now < expires:
+        return iface
+    iface = None
+    with open('/proc/net/route', 'rb') as f:
+        next(f) # skip header
+        for line in f:
+            # columns: Iface, Destination, ... (destination is always 8 hex digits)
+            fields = line.split(b"\t", 2)
+            if fields[1] == b"00000000":
+                iface = fields[0].decode()
+                break
+    _defaultInterface = (now + _NETWORK_CACHE_TTL, iface)
+    return iface
 
 def getIpAddress(ifname: str=None) -> str:
+    global _ipSocket # pylint: disable=global-statement
     if not ifname:
         ifname = getDefaultInterface()
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    return socket.inet_ntoa(fcntl.ioctl(s.fileno(), 0x8915, struct.pack('256s', ifname[:15].encode()))[20:24])
+    now = time.monotonic()
+    if ifname in _ipAddresses and now < _ipAddresses[ifname][0]:
+        return _ipAddresses[ifname][1]
+    if _ipSocket is None:
+        _ipSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # ifr_name is 16 bytes (15 + NUL), the kernel fills in the rest in place
+    _ipRequest[:16] = ifname[:15].encode().ljust(16, b"\0")
+    fcntl.ioctl(_ipSocket.fileno(), 0x8915, _ipRequest, True) # SIOCGIFADDR
+    address = socket.inet_ntoa(_ipRequest[20:24])
+    _ipAddresses[ifname] = (now + _NETWORK_CACHE_TTL, address)
+    return address
 
 def initConfig():
     logging.debug("initialising config...")
     checkDir(userConfDir)
-    for root, dirs, files in os.walk(confDir):
-        userRoot = root.replace(moduleDir, userDir)
-        for d in dirs:
-            dest = os.path.join(userRoot, d)
-            if not os.path.exists(dest):
-                mkdir(dest)
-
-        for f in files:
-            dest = os.path.join(userRoot, f)
-            source = os.path.join(root, f)
-            if not os.path.exists(dest):
-                logging.debug("copying %s to %s", source, dest)
-                shutil.copy(source, dest)
+    # scandir entries already know their type and each user directory is
+    # listed once, rather than calling stat() for every file
+    stack = [(confDir, False)]
+    while stack:
+        root, created = stack.pop()
+        userRoot = root.replace(moduleDir, userDir, 1)
+        # a directory we have just made is known to be empty
+        existing = set() if created else set(os.listdir(userRoot))
+        with os.scandir(root) as entries:
+            for entry in entries:
+                dest = os.path.join(userRoot, entry.name)
+                if entry.is_dir():
+                    created = entry.name not in existing
+                    if created:
+                        logging.debug("initConfig: creating directory: %s", dest)
+                        os.mkdir(dest)
+                    stack.append((entry.path, created))
+                elif entry.name not in existing:
+                    logging.debug("copying %s to %s", entry.path, dest)
+                    # not os.link: user config files are edited in place and
+                    # must not write through to the seed files
+                    # (shutil.copy uses sendfile on Linux and keeps the mode bits)
+                    shutil.copy(entry.path, dest)
 
 def initDb():
     checkFile(primaryDb)
@@ -135,27 +183,13 @@ def scaleImage(ix: int, iy: int, bx: int, by: int) -> tuple[int, int]:
     URL: http://www.pygame.org/pcr/transform_scale
     Modified by Neil Munday
     """
-    if ix > iy:
+    # compare the aspect ratios by cross multiplying so that only
+    # integer arithmetic is needed
+    if bx * iy <= by * ix:
         # fit to width
-        scale_factor = bx/float(ix)
-        sy = scale_factor * iy
-        if sy > by:
-            scale_factor = by / float(iy)
-            sx = scale_factor * ix
-            sy = by
-        else:
-            sx = bx
-    else:
-        # fit to height
-        scale_factor = by / float(iy)
-        sx = scale_factor * ix
-        if sx > bx:
-            scale_factor = bx / float(ix)
-            sx = bx
-            sy = scale_factor * iy
-        else:
-            sy = by
-    return (int(sx), int(sy))
+        return (bx, bx * iy // ix)
+    # fit to height
+    return (by * ix // iy, by)
 
 class Settings:
 
@@ -170,28 +204,31 @@ class Settings:
         self._configparser = configparser.RawConfigParser()
         self._configparser.read(f)
         self._path = f
-        self._props = None
+        # (section, prop) -> type, so that look ups need one hash
+        self._propTypes = {}
         if props:
-            self._props = props
+            self._propTypes = { (section, prop): t for section, sectionProps in props.items() for prop, t in sectionProps.items() }
 
     def get(self, section: str, prop: str) -> str:
         logging.debug("Settings.get: section = %s, prop = %s", section, prop)
-        if not self._configparser.has_section(section):
+        try:
+            rslt = self._configparser.get(section, prop)
+        except configparser.NoSectionError:
             logging.warning("No section \"%s\" in \"%s\"", section, self._path)
             return None
-        if not self._configparser.has_option(section, prop):
+        except configparser.NoOptionError:
             logging.warning("No property \"[%s]:%s\" in \"%s\"", section, prop, self._path)
             return None
-        if section in self._props and prop in self._props[section]:
-            if self._props[section][prop] == Settings.BOOL_PROP:
+        if self._propTypes:
+            t = self._propTypes.get((section, prop))
+            if t == Settings.BOOL_PROP:
                 logging.debug("Settings.get: returning boolean for [%s]:%s", section, prop)
                 return self._configparser.getboolean(section, prop)
-            if self._props[section][prop] == Settings.INT_PROP:
+            if t == Settings.INT_PROP:
                 logging.debug("Settings.get: returning int for [%s]:%s", section, prop)
                 return self._configparser.getint(section, prop)
         # assume string
         logging.debug("Settings.get: returning string for [%s]:%s", section, prop)
-        rslt = self._configparser.get(section, prop)
         if rslt is None or len(rslt) == 0:
             return None
         return rslt
@@ -200,9 +237,7 @@ class Settings:
         return self._configparser.sections()
 
     def getType(self, section: str, prop: str) -> int:
-        if section in self._props and prop in self._props[section]:
-            return self._props[section][prop]
-        return None
+        return self._propTypes.get((section, prop))
 
     def hasSection(self, s: str) -> bool:
         return self._configparser.has_section(s)
@@ -229,34 +264,38 @@ class ConsoleSettings(Settings):
         }
 
         self.__optionalProps = ["ignore_roms", "require"]
+        # consoles.ini is only read once, so parse every value up front
         self.__cache = {}
+        for section in self._configparser.sections():
+            values = {}
+            for prop, propType in self.__props.items():
+                if self._configparser.has_option(section, prop):
+                    values[prop] = self.__parseValue(section, prop, propType)
+            self.__cache[section] = values
+
+    def __parseValue(self, section: str, prop: str, propType: int):
+        if propType == Settings.INT_PROP:
+            return self._configparser.getint(section, prop)
+        if propType == Settings.PATH_PROP:
+            return self.__parseStr(self._configparser.get(section, prop))
+        if propType == Settings.LIST_PROP:
+            return [self.__parseStr(i) for i in self._configparser.get(section, prop).split(",")]
+        return self._configparser.get(section, prop)
 
     def get(self, section: str, prop: str) -> str:
-        if not self._configparser.has_option(section, prop):
-            if prop in self.__optionalProps:
-                return None
-            raise Exception(f"{section} has no option \"{prop}\" in {self._path}")
-        if not prop in self.__props:
+        values = self.__cache.get(section)
+        if values is not None and prop in values:
+            return values[prop]
+        if prop not in self.__props and self._configparser.has_option(section, prop):
             raise Exception(f"{prop} is not in props dictionary")
-        if section not in self.__cache:
-            self.__cache[section] = {}
-        if not prop in self.__cache[section]:
-            if self.__props[prop] == Settings.INT_PROP:
-                self.__cache[section][prop] = self._configparser.getint(section, prop)
-            elif self.__props[prop] == Settings.PATH_PROP:
-                self.__cache[section][prop] = self.__parseStr(self._configparser.get(section, prop))
-            elif self.__props[prop] == Settings.LIST_PROP:
-                l = []
-                for i in self._configparser.get(section, prop).split(","):
-                    l.append(self.__parseStr(i))
-                self.__cache[section][prop] = l
-            else:
-                self.__cache[section][prop] = self._configparser.get(section, prop)
-        return self.__cache[section][prop]
+        if prop in self.__optionalProps:
+            return None
+        raise Exception(f"{section} has no option \"{prop}\" in {self._path}")
 
     @staticmethod
     def __parseStr(s: str) -> str:
-        return s.replace("%%USERDIR%%", userDir).replace("%%BASE%%", baseDir).replace("%%USERBIOSDIR%%", userBiosDir).replace("%%USERCONFDIR%%", userConfDir)
+        # one pass over the string rather than one per variable
+        return _CONSOLE_VARIABLE_RE.sub(lambda m: _CONSOLE_VARIABLES[m.group(1)], s)
 
 class UserSettings(Settings):
 
@@ -288,15 +327,26 @@ class UserSettings(Settings):
             }
         }
         super().__init__(userPesConfigFile, props)
+        # (section, prop) -> string with %%USERDIR%% already substituted
+        self.__strCache = {}
 
     def get(self, section: str, prop: str) -> str:
+        key = (section, prop)
+        if key in self.__strCache:
+            return self.__strCache[key]
         rslt = super().get(section, prop)
         if self.getType(section, prop) == Settings.STR_PROP:
             if rslt is None or len(rslt) == 0:
                 return None
-            return rslt.replace("%%USERDIR%%", userDir)
+            if "%%USERDIR%%" in rslt:
+                rslt = rslt.replace("%%USERDIR%%", userDir)
+            self.__strCache[key] = rslt
         return rslt
 
+    def set(self, section: str, prop: str, value):
+        self.__strCache.pop((section, prop), None)
+        super().set(section, prop, value)
+
     @property
     def bluetooth(self) -> bool:
         value = self.get("settings", "bluetooth")
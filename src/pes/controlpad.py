@@ -31,7 +31,7 @@ import logging
 # third-party imports
 import sdl2
 
-from PyQt5.QtCore import pyqtProperty, pyqtSignal, pyqtSlot, Q_ENUMS, QObject
+from PyQt5.QtCore import pyqtProperty, pyqtSignal, pyqtSlot, Q_ENUMS, QObject, Qt
 
 JOYSTICK_AXIS_MIN = -30000
 JOYSTICK_AXIS_MAX =  30000
@@ -41,7 +41,7 @@ def getLitteEndianFromHex(x: str) -> int:
     Returns the little endian value of the given
     hex value.
     """
-    return int(f"{x[2:4]}{x[0:2]}", 16)
+    return int.from_bytes(bytes.fromhex(x), "little")
 
 def getJoystickGUIDString(guid) -> str:
     """
@@ -51,24 +51,28 @@ def getJoystickGUIDString(guid) -> str:
     # pylint: disable=line-too-long
     # workaround for http://bugs.python.org/issue22273
     # thanks to https://github.com/GreatFruitOmsk/py-sdl2/commit/e9b13cb5a13b0f5265626d02b0941771e0d1d564
-    s = ''
-    for g in guid.data:
-        s += "{:x}".format(g >> 4) # pylint: disable=consider-using-f-string
-        s += "{:x}".format(g & 0x0F) # pylint: disable=consider-using-f-string
-    return s
+    return bytes(guid.data).hex()
 
-def getJoystickDeviceInfoFromGUID(guid: str) -> tuple[str, str]:
+def getJoystickDeviceInfoFromGUID(guid: str) -> tuple[int, int]:
     """
     Returns a tuple containing the vendor and product ID of the
     given GUID.
     """
-    vendorId = guid[8:12]
-    productId = guid[16:20]
-    # swap from big endian to little endian and covert to an int
-    vendorId = getLitteEndianFromHex(vendorId)
-    productId = getLitteEndianFromHex(productId)
+    # IDs are stored little endian in the GUID
+    vendorId = int.from_bytes(bytes.fromhex(guid[8:12]), "little")
+    productId = int.from_bytes(bytes.fromhex(guid[16:20]), "little")
     return (vendorId, productId)
 
+def _indexNames(names: dict) -> tuple:
+    """
+    Returns a tuple of the given names indexed by their
+    SDL enum value, with None for any gaps.
+    """
+    indexed = [None] * (max(names) + 1)
+    for value, name in names.items():
+        indexed[value] = name
+    return tuple(indexed)
+
 class ControlPad(QObject):
     """
     ControlPad class.
@@ -112,55 +116,30 @@ class ControlPad(QObject):
     Q_ENUMS(Axis)
     Q_ENUMS(Button)
 
-    __nameMap = {
-        "axis": {
-            Axis.LeftTriggerAxis: "Left trigger",
-            Axis.LeftX: "Left axis: X direction",
-            Axis.LeftY: "Left axis: Y direction",
-            Axis.RightTriggerAxis: "Right trigger",
-            Axis.RightX: "Right axis: X direction",
-            Axis.RightY: "Right axis: Y direction"
-        },
-        "buttons": {
-            Button.AButton: "A Button",
-            Button.BackButton: "Back Button",
-            Button.BButton: "B Button",
-            Button.DownButton: "Down Button",
-            Button.GuideButton: "Guide Button",
-            Button.LeftButton: "Left Button",
-            Button.LeftShoulderButton: "Left Shoulder Button",
-            Button.RightButton: "Right Button",
-            Button.RightShoulderButton: "Right Shoulder Button",
-            Button.UpButton: "Up Button",
-            Button.StartButton: "Start Button",
-            Button.XButton: "X Button",
-            Button.YButton: "Y Button"
-        }
-    }
-
     def __init__(self, name: str, guid: str, parent: QObject = None):
         super().__init__(parent)
         self.__name = name
         self.__guid = guid
-        self.__present = True
 
     @staticmethod
     def getAxisName(axis: int) -> str:
         """
         Returns the string name for the given axis value.
         """
-        if axis not in ControlPad.__nameMap["axis"]:
-            raise ValueError("f{axis} not found")
-        return ControlPad.__nameMap["axis"][axis]
+        name = _AXIS_NAMES[axis] if 0 <= axis < len(_AXIS_NAMES) else None
+        if name is None:
+            raise ValueError(f"{axis} not found")
+        return name
 
     @staticmethod
     def getButtonName(button: int) -> str:
         """
         Returns the string name for the given button value.
         """
-        if button not in ControlPad.__nameMap["buttons"]:
+        name = _BUTTON_NAMES[button] if 0 <= button < len(_BUTTON_NAMES) else None
+        if name is None:
             raise ValueError(f"{button} not found")
-        return ControlPad.__nameMap["buttons"][button]
+        return name
 
     @pyqtProperty(str)
     def guid(self) -> str:
@@ -176,23 +155,34 @@ class ControlPad(QObject):
         """
         return self.__name
 
-    @pyqtProperty(bool)
-    def present(self) -> bool:
-        """
-        Returns true if the control pad is present, false otherwise.
-        """
-        return self.__present
-
-    @present.setter
-    def present(self, present: bool):
-        """
-        Set the present status of the control pad.
-        """
-        self.__present = present
-
     def __repr__(self) -> str:
         return f"<ControlPad guid=\"{self.__guid}\" name=\"{self.__name}\">"
 
+# names indexed by SDL enum value
+_AXIS_NAMES = _indexNames({
+    ControlPad.Axis.LeftTriggerAxis: "Left trigger",
+    ControlPad.Axis.LeftX: "Left axis: X direction",
+    ControlPad.Axis.LeftY: "Left axis: Y direction",
+    ControlPad.Axis.RightTriggerAxis: "Right trigger",
+    ControlPad.Axis.RightX: "Right axis: X direction",
+    ControlPad.Axis.RightY: "Right axis: Y direction"
+})
+_BUTTON_NAMES = _indexNames({
+    ControlPad.Button.AButton: "A Button",
+    ControlPad.Button.BackButton: "Back Button",
+    ControlPad.Button.BButton: "B Button",
+    ControlPad.Button.DownButton: "Down Button",
+    ControlPad.Button.GuideButton: "Guide Button",
+    ControlPad.Button.LeftButton: "Left Button",
+    ControlPad.Button.LeftShoulderButton: "Left Shoulder Button",
+    ControlPad.Button.RightButton: "Right Button",
+    ControlPad.Button.RightShoulderButton: "Right Shoulder Button",
+    ControlPad.Button.UpButton: "Up Button",
+    ControlPad.Button.StartButton: "Start Button",
+    ControlPad.Button.XButton: "X Button",
+    ControlPad.Button.YButton: "Y Button"
+})
+
 class ControlPadListener(QObject):
     """
     Helper class to fire control pad events.
@@ -204,24 +194,34 @@ class ControlPadListener(QObject):
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        # bind the emit methods once rather than on every event
+        self.__emitAxisEvent = self.axisEvent.emit
+        self.__emitButtonEvent = self.buttonEvent.emit
+        self.__emitTotalChangedEvent = self.totalChangedEvent.emit
 
     def fireAxisEvent(self, axis: int, value: int, controlPad: ControlPad):
         """
         Fires the given axis event
         """
-        self.axisEvent.emit(axis, value, controlPad)
+        self.__emitAxisEvent(axis, value, controlPad)
 
     def fireButtonEvent(self, button: int, controlPad: ControlPad):
         """
         Fires the given button event.
         """
-        self.buttonEvent.emit(button, controlPad)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                "ControlPadListener.fireButtonEvent: %s",
+                ControlPad.getButtonName(button)
+            )
+        self.__emitButtonEvent(button, controlPad)
 
     def fireTotalChangedEvent(self, total: int):
         """
         Fires the control pad total changed event.
         """
-        self.totalChangedEvent.emit(total)
+        logging.debug("ControlPadListener.fireTotalChangedEvent: %d", total)
+        self.__emitTotalChangedEvent(total)
 
 class ControlPadManager(QObject):
     """
@@ -233,69 +233,36 @@ class ControlPadManager(QObject):
     totalChangedEvent = pyqtSignal(int, arguments=['total'])
     __listener = ControlPadListener() # shared instance
     __controlPads = {} # shared dictionary of connected control pads
+    __padByIndex = [] # ControlPad (or None) for each SDL device index, rebuilt on each poll
+    __eventBuffer = (sdl2.SDL_Event * 64)() # reused by processEvents
+    __axisBuckets = {} # (index, axis) -> bucket of the last processed activated value
     __configMode = False
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        # connect this instance to the shared ControlPadListener instance
-        self.__listener.axisEvent.connect(self.__fireAxisEvent)
-        self.__listener.buttonEvent.connect(self.__fireButtonEvent)
-        self.__listener.totalChangedEvent.connect(self.__fireTotalChangedEvent)
-
-    @staticmethod
-    def __beginUpdate():
-        """
-        This method should be called before polling connected
-        control pads.
-        """
-        for controlPad in ControlPadManager.__controlPads.values():
-            controlPad.present = False
+        # forward the shared ControlPadListener signals straight to this
+        # instance's signals so that Qt relays them without a Python slot,
+        # both objects live in the GUI thread so the connection is direct
+        self.__listener.axisEvent.connect(self.axisEvent, Qt.DirectConnection)
+        self.__listener.buttonEvent.connect(self.buttonEvent, Qt.DirectConnection)
+        self.__listener.totalChangedEvent.connect(self.totalChangedEvent, Qt.DirectConnection)
 
     @staticmethod
-    def __endUpdate():
+    def __endUpdate(seen: set):
         """
         This method should be called after polling connected
-        control pads is complete.
-        """
-        toRemove = [
-            controlPad for controlPad in
-                ControlPadManager.__controlPads.values() if not controlPad.present
-        ]
-        if len(toRemove) > 0:
-            for controlPad in toRemove:
+        control pads is complete. Any control pad whose GUID
+        was not seen is removed.
+        """
+        controlPads = ControlPadManager.__controlPads
+        gone = controlPads.keys() - seen
+        if gone:
+            for guid in gone:
                 logging.info(
                     "ControlPadManager.__endUpdate: %s is no longer connected",
-                    controlPad.name
+                    controlPads.pop(guid).name
                 )
-                del ControlPadManager.__controlPads[controlPad.guid]
-            ControlPadManager.__listener.fireTotalChangedEvent(len(ControlPadManager.__controlPads))
-
-    @pyqtSlot(int, int, ControlPad)
-    def __fireAxisEvent(self, axis: int, value: int, controlPad: ControlPad):
-        """
-        Fire axis event.
-        """
-        logging.debug(
-            "ControlPadManager.__fireAxisEvent: %s, value: %d",
-            ControlPad.getAxisName(axis), value
-        )
-        self.axisEvent.emit(axis, value, controlPad)
-
-    @pyqtSlot(int, ControlPad)
-    def __fireButtonEvent(self, button: int, controlPad: ControlPad):
-        """
-        Fire button event.
-        """
-        logging.debug("ControlPadManager.__fireButtonEvent: %s", ControlPad.getButtonName(button))
-        self.buttonEvent.emit(button, controlPad)
-
-    @pyqtSlot(int)
-    def __fireTotalChangedEvent(self, total: int):
-        """
-        Fire control pad total changed event.
-        """
-        logging.debug("ControlPadManager.__fireTotalChangedEvent: %d", total)
-        self.totalChangedEvent.emit(total)
+            ControlPadManager.__listener.fireTotalChangedEvent(len(controlPads))
 
     @pyqtProperty(bool)
     def configMode(self) -> bool:
@@ -326,67 +293,168 @@ class ControlPadManager(QObject):
         Processes the given SDL event.
         """
         if event.type == sdl2.SDL_CONTROLLERBUTTONUP and event.cbutton.state == sdl2.SDL_RELEASED:
-            joystickGUID = getJoystickGUIDString(
-                sdl2.SDL_JoystickGetDeviceGUID(event.cbutton.which)
-            )
             ControlPadManager.__listener.fireButtonEvent(
                 event.cbutton.button,
-                ControlPadManager.__controlPads[joystickGUID]
+                ControlPadManager.__getControlPad(event.cbutton.which)
             )
         elif event.type == sdl2.SDL_CONTROLLERAXISMOTION:
-            if event.caxis.value < JOYSTICK_AXIS_MIN or event.caxis.value > JOYSTICK_AXIS_MAX:
-                joystickGUID = getJoystickGUIDString(
-                    sdl2.SDL_JoystickGetDeviceGUID(event.cbutton.which)
-                )
-                logging.debug(
-                    "ControlPadManager.processEvent: axis \"%s\" activated: %d",
-                    sdl2.SDL_GameControllerGetStringForAxis(event.caxis.axis),
-                    event.caxis.value
-                )
-                ControlPadManager.__listener.fireAxisEvent(
-                    event.caxis.axis,
-                    event.caxis.value,
-                    ControlPadManager.__controlPads[joystickGUID]
-                )
+            caxis = event.caxis
+            if ControlPadManager.__axisChanged(caxis.which, caxis.axis, caxis.value):
+                ControlPadManager.__processAxis(caxis.which, caxis.axis, caxis.value)
+
+    @staticmethod
+    def processEvents():
+        """
+        Drains all pending SDL control pad events.
+        Button events are processed in order, whereas only the
+        last changed activated value for each axis of each control
+        pad is processed once the queue is empty.
+        """
+        sdl2.SDL_PumpEvents()
+        listener = ControlPadManager.__listener
+        if (
+            listener.receivers(listener.axisEvent) == 0 and
+            listener.receivers(listener.buttonEvent) == 0
+        ):
+            # no ControlPadManager has been created yet, so discard the events
+            sdl2.SDL_FlushEvents(sdl2.SDL_CONTROLLERAXISMOTION, sdl2.SDL_CONTROLLERBUTTONUP)
+            return
+        events = ControlPadManager.__eventBuffer
+        size = len(events)
+        axisValues = {}
+        while True:
+            total = sdl2.SDL_PeepEvents(
+                events, size, sdl2.SDL_GETEVENT,
+                sdl2.SDL_CONTROLLERAXISMOTION, sdl2.SDL_CONTROLLERBUTTONUP
+            )
+            for i in range(total):
+                event = events[i]
+                if event.type == sdl2.SDL_CONTROLLERAXISMOTION:
+                    caxis = event.caxis
+                    if ControlPadManager.__axisChanged(caxis.which, caxis.axis, caxis.value):
+                        axisValues[(caxis.which, caxis.axis)] = caxis.value
+                else:
+                    ControlPadManager.processEvent(event)
+            if total < size:
+                break
+        for (index, axis), value in axisValues.items():
+            ControlPadManager.__processAxis(index, axis, value)
+
+    @staticmethod
+    def __axisChanged(index: int, axis: int, value: int) -> bool:
+        """
+        Returns True if the given axis is activated and has moved
+        since it was last processed. Values are compared in buckets
+        of 256 so that jitter from a held stick or trigger is ignored.
+        """
+        key = (index, axis)
+        if JOYSTICK_AXIS_MIN <= value <= JOYSTICK_AXIS_MAX:
+            # back inside the dead zone, so the next activation is new
+            ControlPadManager.__axisBuckets.pop(key, None)
+            return False
+        bucket = value >> 8
+        if ControlPadManager.__axisBuckets.get(key) == bucket:
+            return False
+        ControlPadManager.__axisBuckets[key] = bucket
+        return True
+
+    @staticmethod
+    def __processAxis(index: int, axis: int, value: int):
+        """
+        Fires an axis event for an axis that has been activated.
+        """
+        # only look up the axis name if it will be logged
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                "ControlPadManager.processEvent: axis \"%s\" activated: %d",
+                sdl2.SDL_GameControllerGetStringForAxis(axis),
+                value
+            )
+        ControlPadManager.__listener.fireAxisEvent(
+            axis,
+            value,
+            ControlPadManager.__getControlPad(index)
+        )
+
+    @staticmethod
+    def __getControlPad(index: int) -> ControlPad:
+        """
+        Returns the ControlPad for the given SDL device index.
+        """
+        controlPad = None
+        if index < len(ControlPadManager.__padByIndex):
+            controlPad = ControlPadManager.__padByIndex[index]
+        if controlPad is None:
+            # not polled yet, look up the pad via its GUID
+            controlPad = ControlPadManager.__controlPads[
+                getJoystickGUIDString(sdl2.SDL_JoystickGetDeviceGUID(index))
+            ]
+        return controlPad
+
+    @staticmethod
+    def getTotal() -> int:
+        """
+        Returns the total number of control pads connected,
+        without needing a ControlPadManager instance.
+        """
+        return len(ControlPadManager.__controlPads)
 
     @pyqtProperty(int, notify=totalChangedEvent)
     def total(self) -> int:
         """
         Returns the total number of control pads connected.
         """
-        return len(ControlPadManager.__controlPads)
+        return ControlPadManager.getTotal()
 
     @staticmethod
     def updateControlPads():
         """
         Poll the control pads that are currently connected.
         """
-        ControlPadManager.__beginUpdate()
         joystickTotal = sdl2.joystick.SDL_NumJoysticks()
+        padByIndex = [None] * joystickTotal
+        seen = set()
+        controlPads = ControlPadManager.__controlPads
 
         if joystickTotal > 0:
             for i in range(joystickTotal):
+                joystickGUID = getJoystickGUIDString(sdl2.SDL_JoystickGetDeviceGUID(i))
+                controlPad = controlPads.get(joystickGUID)
+                if controlPad is not None and (
+                    i > 0 or
+                    sdl2.SDL_GameControllerFromInstanceID(sdl2.SDL_JoystickGetDeviceInstanceID(0))
+                ):
+                    # already known (and the first pad is still open),
+                    # so there is no need to open it again
+                    seen.add(joystickGUID)
+                    padByIndex[i] = controlPad
+                    continue
                 if sdl2.SDL_IsGameController(i):
                     c = sdl2.SDL_GameControllerOpen(i)
                     if sdl2.SDL_GameControllerGetAttached(c):
-                        controlPadName = sdl2.SDL_GameControllerNameForIndex(i).decode()
-                        joystickGUID = getJoystickGUIDString(sdl2.SDL_JoystickGetDeviceGUID(i))
-                        ControlPadManager.__updateControlPad(joystickGUID, controlPadName)
+                        padByIndex[i] = ControlPadManager.__updateControlPad(
+                            joystickGUID, sdl2.SDL_GameControllerNameForIndex(i).decode()
+                        )
+                        seen.add(joystickGUID)
 
                     if i > 0:
                         # only allow first controller to control GUI
                         sdl2.SDL_GameControllerClose(c)
 
-        ControlPadManager.__endUpdate()
+        ControlPadManager.__endUpdate(seen)
+        ControlPadManager.__padByIndex = padByIndex
 
     @staticmethod
-    def __updateControlPad(guid: str, name: str):
+    def __updateControlPad(guid: str, name: str) -> ControlPad:
         """
-        Update the list of control pads.
+        Update the list of control pads and return the
+        ControlPad for the given GUID.
         """
-        if guid in ControlPadManager.__controlPads:
-            ControlPadManager.__controlPads[guid].present = True
-            return
+        controlPads = ControlPadManager.__controlPads
+        controlPad = controlPads.get(guid)
+        if controlPad is not None:
+            return controlPad
         logging.debug("ControlPadManager.addControlPad: adding %s (%s)", guid, name)
-        ControlPadManager.__controlPads[guid] = ControlPad(name, guid)
-        ControlPadManager.__listener.fireTotalChangedEvent(len(ControlPadManager.__controlPads))
+        controlPad = controlPads[guid] = ControlPad(name, guid)
+        ControlPadManager.__listener.fireTotalChangedEvent(len(controlPads))
+        return controlPad
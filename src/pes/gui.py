@@ -27,15 +27,16 @@ This module creates the PES GUI.
 """
 
 # standard imports
+import contextlib
 import datetime
 import logging
 import os
+import threading
+import time
 
 # third-party imports
 import sdl2
-import sdl2.ext
 import sdl2.joystick
-import sqlalchemy.orm
 
 from PyQt5.QtGui import QGuiApplication, QKeyEvent
 from PyQt5.QtQml import QQmlApplicationEngine, QJSValue, qmlRegisterType
@@ -57,6 +58,48 @@ import pes.romscan
 import pes.sql
 import pes.system
 
+# RetroArch joystick config parameter -> SDL control pad button
+_RA_BUTTON_MAP = (
+    # buttons
+    ("input_a", sdl2.SDL_CONTROLLER_BUTTON_B),
+    ("input_b", sdl2.SDL_CONTROLLER_BUTTON_A),
+    ("input_x", sdl2.SDL_CONTROLLER_BUTTON_Y),
+    ("input_y", sdl2.SDL_CONTROLLER_BUTTON_X),
+    ("input_start", sdl2.SDL_CONTROLLER_BUTTON_START),
+    ("input_select", sdl2.SDL_CONTROLLER_BUTTON_BACK),
+    # shoulder buttons
+    ("input_l", sdl2.SDL_CONTROLLER_BUTTON_LEFTSHOULDER),
+    ("input_r", sdl2.SDL_CONTROLLER_BUTTON_RIGHTSHOULDER),
+    # L3/R3 buttons
+    ("input_l3", sdl2.SDL_CONTROLLER_BUTTON_LEFTSTICK),
+    ("input_r3", sdl2.SDL_CONTROLLER_BUTTON_RIGHTSTICK),
+    # d-pad buttons
+    ("input_up", sdl2.SDL_CONTROLLER_BUTTON_DPAD_UP),
+    ("input_down", sdl2.SDL_CONTROLLER_BUTTON_DPAD_DOWN),
+    ("input_left", sdl2.SDL_CONTROLLER_BUTTON_DPAD_LEFT),
+    ("input_right", sdl2.SDL_CONTROLLER_BUTTON_DPAD_RIGHT),
+)
+
+# RetroArch joystick config parameter -> SDL control pad axis, write both +/- directions
+_RA_AXIS_MAP = (
+    # triggers
+    ("input_l2", sdl2.SDL_CONTROLLER_AXIS_TRIGGERLEFT, False),
+    ("input_r2", sdl2.SDL_CONTROLLER_AXIS_TRIGGERRIGHT, False),
+    # sticks
+    ("input_l_x", sdl2.SDL_CONTROLLER_AXIS_LEFTX, True),
+    ("input_l_y", sdl2.SDL_CONTROLLER_AXIS_LEFTY, True),
+    ("input_r_x", sdl2.SDL_CONTROLLER_AXIS_RIGHTX, True),
+    ("input_r_y", sdl2.SDL_CONTROLLER_AXIS_RIGHTY, True),
+)
+
+# SDL d-pad button -> RetroArch hat direction
+_RA_HAT_DIRECTIONS = {
+    sdl2.SDL_CONTROLLER_BUTTON_DPAD_UP: "up",
+    sdl2.SDL_CONTROLLER_BUTTON_DPAD_DOWN: "down",
+    sdl2.SDL_CONTROLLER_BUTTON_DPAD_LEFT: "left",
+    sdl2.SDL_CONTROLLER_BUTTON_DPAD_RIGHT: "right",
+}
+
 def getRetroArchConfigAxisValue(param, controller, axis, both=False):
     bind = sdl2.SDL_GameControllerGetBindForAxis(controller, axis)
     if bind:
@@ -72,7 +115,9 @@ def getRetroArchConfigAxisValue(param, controller, axis, both=False):
     return f"{param} = \"nul\"\n"
 
 def getRetroArchConfigButtonValue(param, controller, button):
-    bind = sdl2.SDL_GameControllerGetBindForButton(controller, button)
+    return getRetroArchConfigBindValue(param, button, sdl2.SDL_GameControllerGetBindForButton(controller, button))
+
+def getRetroArchConfigBindValue(param, button, bind):
     if bind:
         if bind.bindType == sdl2.SDL_CONTROLLER_BINDTYPE_BUTTON:
             return f"{param}_btn = \"{bind.value.button}\"\n"
@@ -82,14 +127,9 @@ def getRetroArchConfigButtonValue(param, controller, button):
                 return f"{param}_axis = \"-{bind.value.axis}\"\n"
             return f"{param}_axis = \"+{bind.value.axis}\"\n"
         if bind.bindType == sdl2.SDL_CONTROLLER_BINDTYPE_HAT:
-            if button == sdl2.SDL_CONTROLLER_BUTTON_DPAD_UP:
-                return f"{param}_btn = \"h{bind.value.hat.hat}up\"\n"
-            if button == sdl2.SDL_CONTROLLER_BUTTON_DPAD_DOWN:
-                return f"{param}_btn = \"h{bind.value.hat.hat}down\"\n"
-            if button == sdl2.SDL_CONTROLLER_BUTTON_DPAD_LEFT:
-                return f"{param}_btn = \"h{bind.value.hat.hat}left\"\n"
-            if button == sdl2.SDL_CONTROLLER_BUTTON_DPAD_RIGHT:
-                return f"{param}_btn = \"h{bind.value.hat.hat}right\"\n"
+            direction = _RA_HAT_DIRECTIONS.get(button)
+            if direction:
+                return f"{param}_btn = \"h{bind.value.hat.hat}{direction}\"\n"
     return f"{param} = \"nul\"\n"
 
 class Backend(QObject):
@@ -104,7 +144,7 @@ class Backend(QObject):
         self.__updateDateTimeFormat()
         self.__dbusBroker = pes.system.DbusBroker()
         if self.__dbusBroker.btAvailable():
-            self.__btAgent = pes.system.BluetoothAgent()
+            self.__btAgent = pes.system.BluetoothAgent(self.__dbusBroker)
             # set-up Bluetooth so it can be paired etc.
             self.__dbusBroker.btPowered = True
             self.__dbusBroker.btDiscoverable = True
@@ -115,7 +155,12 @@ class Backend(QObject):
             self.__btAgent = None
         self.__screenSaverTimeout = self.__userSettings.get("settings", "screenSaverTimeout")
         self.__gamepadTotal = 0
+        self.__consoleDicts = {} # console ID -> Console.getDict()
         logging.debug("Backend.__init__: connecting to database: %s", pes.userDb)
+        # long-lived session for read-only queries made by QML, sessions are
+        # not thread safe so other threads (the web server) get their own per call
+        self.__guiSession = pes.sql.Session()
+        self.__guiThreadId = threading.get_ident()
         #self.__romscanThread = None
 
     @pyqtSlot(result=bool)
@@ -129,6 +174,10 @@ class Backend(QObject):
     @pyqtSlot()
     def close(self):
         logging.debug("Backend.close: closing...")
+        if self.__btAgent:
+            self.__btAgent.unregister()
+        self.__dbusBroker.close()
+        self.__guiSession.close()
         self.closeSignal.emit()
 
     @staticmethod
@@ -145,11 +194,23 @@ class Backend(QObject):
         os.chmod(pes.userScriptFile, 0o700)
         logging.debug("Backend.__createCommandFile: done")
 
+    @contextlib.contextmanager
+    def __readSession(self):
+        if threading.get_ident() != self.__guiThreadId:
+            with pes.sql.Session() as session:
+                yield session
+            return
+        try:
+            yield self.__guiSession
+        finally:
+            # end the transaction so the next read sees changes made elsewhere (e.g. by the ROM scanner)
+            self.__guiSession.rollback()
+
     @pyqtSlot(int, bool)
     def favouriteGame(self, gameId, favourite):
         logging.debug("Backend.favouriteGame: %d -> %s", gameId, favourite)
         with pes.sql.Session.begin() as session:
-            game = session.query(pes.sql.Game).get(gameId)
+            game = session.get(pes.sql.Game, gameId)
             if game:
                 game.favourite = favourite
                 session.add(game)
@@ -178,30 +239,38 @@ class Backend(QObject):
     @pyqtSlot(int, result=str)
     def getConsoleArt(self, consoleId):
         logging.debug("Backend.getConsoleArt: getting console art URL for %d", consoleId)
-        with pes.sql.Session() as session:
-            console = session.query(pes.sql.Console).get(consoleId)
-            if console:
-                path = os.path.join(pes.imagesDir, console.art)
-                logging.debug("Backend.getConsoleArt: path is %s", path)
-                return path
+        console = self.__getConsoleDict(consoleId)
+        if console:
+            path = os.path.join(pes.imagesDir, console["art"])
+            logging.debug("Backend.getConsoleArt: path is %s", path)
+            return path
         logging.error("Backend.getConsoleArt: could not find console with ID: %d", consoleId)
         return None
 
     @pyqtSlot(int, result=str)
     def getConsole(self, consoleId):
         logging.debug("Backend.getConsole: getting console with ID: %d", consoleId)
-        with pes.sql.Session() as session:
-            console = session.query(pes.sql.Console).get(consoleId)
-            if console:
-                return console.getDict()
+        console = self.__getConsoleDict(consoleId)
+        if console:
+            return dict(console)
         logging.error("Backend.getConsole: could not find console with ID: %d", consoleId)
         return None
 
+    def __getConsoleDict(self, consoleId):
+        # consoles do not change whilst PES is running, so each one is only read once
+        console = self.__consoleDicts.get(consoleId)
+        if console is None:
+            with self.__readSession() as session:
+                c = session.get(pes.sql.Console, consoleId)
+                if c:
+                    console = self.__consoleDicts[consoleId] = c.getDict()
+        return console
+
     @pyqtSlot(bool, result=list)
     def getConsoles(self, withGames=False):
         logging.debug("Backend.getConsoles: getting consoles, withGames = %s", withGames)
         consoleList = []
-        with pes.sql.Session() as session:
+        with self.__readSession() as session:
             if withGames:
                 result = session.query(pes.sql.Console).join(pes.sql.Game).order_by(pes.sql.Console.name).all()
             else:
@@ -223,8 +292,8 @@ class Backend(QObject):
     @pyqtSlot(int, result=QVariant)
     def getGame(self, gameId):
         logging.debug("Backend.getGame: getting game: %d", gameId)
-        with pes.sql.Session() as session:
-            game = session.query(pes.sql.Game).get(gameId)
+        with self.__readSession() as session:
+            game = session.get(pes.sql.Game, gameId, options=pes.sql.GAME_DICT_OPTIONS)
             if game:
                 return game.getDict()
         logging.error("Backend.getGame: could not find game for: %d", gameId)
@@ -232,27 +301,20 @@ class Backend(QObject):
 
     @pyqtSlot(int, result=list)
     def getFavouriteGames(self, consoleId=None):
-        games = []
-        with pes.sql.Session() as session:
+        with self.__readSession() as session:
             if not consoleId or consoleId == 0:
                 logging.debug("Backand.getFavouriteGames: getting favourite games for all consoles")
-                result = session.query(pes.sql.Game).filter(pes.sql.Game.favourite).order_by(pes.sql.Game.name)
-            else:
-                logging.debug("Backend.getFavouriteGames: getting favourite games for console %d", consoleId)
-                result = session.query(pes.sql.Game).filter(sqlalchemy.sql.expression.and_(pes.sql.Game.consoleId == consoleId, pes.sql.Game.favourite)).order_by(pes.sql.Game.name)
-            for g in result:
-                games.append(g.getDict())
-        return games
+                return pes.sql.Game.selectDicts(session, pes.sql.Game.favourite, orderBy=pes.sql.Game.name)
+            logging.debug("Backend.getFavouriteGames: getting favourite games for console %d", consoleId)
+            return pes.sql.Game.selectDicts(session, pes.sql.Game.consoleId == consoleId, pes.sql.Game.favourite, orderBy=pes.sql.Game.name)
 
     @pyqtSlot(int, result=list)
-    def getGames(self, consoleId):
-        logging.debug("Backend.getGames: getting games for console %d", consoleId)
-        games = []
-        with pes.sql.Session() as session:
-            result = session.query(pes.sql.Game).filter(pes.sql.Game.consoleId == consoleId).order_by(pes.sql.Game.name)
-            for g in result:
-                games.append(g.getDict())
-        return games
+    @pyqtSlot(int, int, int, result=list)
+    def getGames(self, consoleId, offset=0, limit=0):
+        logging.debug("Backend.getGames: getting games for console %d, offset = %d, limit = %d", consoleId, offset, limit)
+        with self.__readSession() as session:
+            # names are not unique, so sort by ID too to keep pages stable
+            return pes.sql.Game.selectDicts(session, pes.sql.Game.consoleId == consoleId, orderBy=(pes.sql.Game.name, pes.sql.Game.id), limit=limit, offset=offset)
 
     @pyqtSlot(result=bool)
     def getHardcoreMode(self):
@@ -266,21 +328,12 @@ class Backend(QObject):
 
     @pyqtSlot(int, int, result=list)
     def getMostPlayedGames(self, consoleId=None, limit=10):
-        games = []
-        with pes.sql.Session() as session:
+        with self.__readSession() as session:
             if not consoleId or consoleId == 0:
                 logging.debug("Backand.getMostPlayedGames: getting most played games for all consoles")
-                result = session.query(pes.sql.Game).filter(pes.sql.Game.playCount > 0).order_by(pes.sql.Game.playCount)
-                if limit > 0:
-                    result = result.limit(limit)
-            else:
-                logging.debug("Backend.getMostPlayedGames: getting most played games for console %d", consoleId)
-                result = session.query(pes.sql.Game).filter(sqlalchemy.sql.expression.and_(pes.sql.Game.consoleId == consoleId, pes.sql.Game.playCount > 0)).order_by(pes.sql.Game.playCount)
-                if limit > 0:
-                    result = result.limit(limit)
-            for g in result:
-                games.append(g.getDict())
-        return games
+                return pes.sql.Game.selectDicts(session, pes.sql.Game.playCount > 0, orderBy=pes.sql.Game.playCount, limit=limit)
+            logging.debug("Backend.getMostPlayedGames: getting most played games for console %d", consoleId)
+            return pes.sql.Game.selectDicts(session, pes.sql.Game.consoleId == consoleId, pes.sql.Game.playCount > 0, orderBy=pes.sql.Game.playCount, limit=limit)
 
     @pyqtSlot(result=bool)
     def getNetworkAvailable(self):
@@ -288,39 +341,21 @@ class Backend(QObject):
 
     @pyqtSlot(int, int, result=list)
     def getRecentlyAddedGames(self, consoleId=None, limit=10):
-        games = []
-        with pes.sql.Session() as session:
+        with self.__readSession() as session:
             if not consoleId or consoleId == 0:
                 logging.debug("Backend.getRecentlyAddedGames: getting games for all consoles")
-                result = session.query(pes.sql.Game).order_by(pes.sql.Game.added.desc())
-                if limit > 0:
-                    result = result.limit(limit)
-            else:
-                logging.debug("Backend.getRecentlyAddedGames: getting games for console %d", consoleId)
-                result = session.query(pes.sql.Game).filter(pes.sql.Game.consoleId == consoleId).order_by(pes.sql.Game.added.desc())
-                if limit > 0:
-                    result = result.limit(limit)
-            for g in result:
-                games.append(g.getDict())
-        return games
+                return pes.sql.Game.selectDicts(session, orderBy=pes.sql.Game.added.desc(), limit=limit)
+            logging.debug("Backend.getRecentlyAddedGames: getting games for console %d", consoleId)
+            return pes.sql.Game.selectDicts(session, pes.sql.Game.consoleId == consoleId, orderBy=pes.sql.Game.added.desc(), limit=limit)
 
     @pyqtSlot(int, int, result=list)
     def getRecentlyPlayedGames(self, consoleId=None, limit=10):
-        games = []
-        with pes.sql.Session() as session:
+        with self.__readSession() as session:
             if not consoleId or consoleId == 0:
                 logging.debug("Backend.getRecentlyPlayedGames: getting games for all consoles")
-                result = session.query(pes.sql.Game).filter(pes.sql.Game.playCount > 0).order_by(pes.sql.Game.lastPlayed.desc())
-                if limit > 0:
-                    result = result.limit(limit)
-            else:
-                logging.debug("Backend.getRecentlyPlayedGames: getting games for console %d", consoleId)
-                result = session.query(pes.sql.Game).filter(pes.sql.Game.consoleId == consoleId).filter(pes.sql.Game.playCount > 0).order_by(pes.sql.Game.lastPlayed.desc())
-                if limit > 0:
-                    result = result.limit(limit)
-            for g in result:
-                games.append(g.getDict())
-        return games
+                return pes.sql.Game.selectDicts(session, pes.sql.Game.playCount > 0, orderBy=pes.sql.Game.lastPlayed.desc(), limit=limit)
+            logging.debug("Backend.getRecentlyPlayedGames: getting games for console %d", consoleId)
+            return pes.sql.Game.selectDicts(session, pes.sql.Game.consoleId == consoleId, pes.sql.Game.playCount > 0, orderBy=pes.sql.Game.lastPlayed.desc(), limit=limit)
 
     @pyqtSlot(result=int)
     def getScreenSaverTimeout(self):
@@ -344,14 +379,15 @@ class Backend(QObject):
         # pylint: disable=too-many-locals
         gameName = None
         with pes.sql.Session.begin() as session:
-            game = session.query(pes.sql.Game).get(gameId)
+            game = session.get(pes.sql.Game, gameId, options=pes.sql.GAME_PLAY_OPTIONS)
             if not game:
                 logging.error("Backend.playGame: could not find game ID %d", gameId)
                 return { "result": False, "msg": f"Could not find game {gameId}" }
 
             logging.debug("Backend.playGame: found game ID %d", gameId)
             gameName = game.name
-            requireFiles = self.__consoleSettings.get(game.console.name, "require")
+            consoleName = game.console.name
+            requireFiles = self.__consoleSettings.get(consoleName, "require")
             if requireFiles:
                 for f in requireFiles:
                     f = f.strip()
@@ -360,16 +396,16 @@ class Backend(QObject):
                         logging.error("Backend.playGame: could not find required file: %s", f)
                         return { "result": False, "msg": f"Could not find required file: {f}"}
             else:
-                logging.debug("Backend.playGame: no required files for console %s", game.console.name)
+                logging.debug("Backend.playGame: no required files for console %s", consoleName)
 
             # generate emulator config
-            emulator = self.__consoleSettings.get(game.console.name, "emulator")
+            emulator = self.__consoleSettings.get(consoleName, "emulator")
             if emulator == "RetroArch":
                 # note: RetroArch uses a SNES control pad button layout, SDL2 uses XBOX 360 layout!
                 # check joystick configs)
-                controlPadManager = pes.controlpad.ControlPadManager()
-                if controlPadManager.total > 0:  # pylint: disable=comparison-with-callable
-                    for i in range(controlPadManager.total):
+                controlPadTotal = pes.controlpad.ControlPadManager.getTotal()
+                if controlPadTotal > 0:
+                    for i in range(controlPadTotal):
                         c = sdl2.SDL_GameControllerOpen(i)
                         if sdl2.SDL_GameControllerGetAttached(c):
                             # get joystick name
@@ -378,48 +414,26 @@ class Backend(QObject):
                             jsConfig = os.path.join(pes.userRetroArchJoysticksConfDir, f"{jsName}.cfg")
                             logging.debug("Backend.playGame: creating configuration file %s for %s", jsConfig, jsName)
                             vendorId, productId = pes.controlpad.getJoystickDeviceInfoFromGUID(pes.controlpad.getJoystickGUIDString(sdl2.SDL_JoystickGetDeviceGUID(i)))
+                            # control pad id etc.
+                            parts = [f"input_device = \"{jsName}\"\n"]
+                            parts.append(f"input_vendor_id = \"{vendorId}\"\n")
+                            parts.append(f"input_product_id = \"{productId}\"\n")
+                            #parts.append("input_driver = \"udev\"\n")
+                            parts.extend(getRetroArchConfigButtonValue(param, c, button) for param, button in _RA_BUTTON_MAP)
+                            parts.extend(getRetroArchConfigAxisValue(param, c, axis, both) for param, axis, both in _RA_AXIS_MAP)
+                            # hot key buttons
+                            bind = sdl2.SDL_GameControllerGetBindForButton(c, sdl2.SDL_CONTROLLER_BUTTON_GUIDE)
+                            if bind:
+                                parts.append(getRetroArchConfigBindValue("input_enable_hotkey", sdl2.SDL_CONTROLLER_BUTTON_GUIDE, bind))
+                            else:
+                                parts.append(getRetroArchConfigButtonValue("input_enable_hotkey", c, sdl2.SDL_CONTROLLER_BUTTON_BACK))
+                            parts.append(getRetroArchConfigButtonValue("input_menu_toggle", c, sdl2.SDL_CONTROLLER_BUTTON_DPAD_UP))
+                            parts.append(getRetroArchConfigButtonValue("input_exit_emulator", c, sdl2.SDL_CONTROLLER_BUTTON_START))
+                            parts.append(getRetroArchConfigButtonValue("input_save_state", c, sdl2.SDL_CONTROLLER_BUTTON_A))
+                            parts.append(getRetroArchConfigButtonValue("input_load_state", c, sdl2.SDL_CONTROLLER_BUTTON_B))
+                            parts.append("input_pause_toggle = \"nul\"\n")
                             with open(jsConfig, "w", encoding="utf-8") as f:
-                                # control pad id etc.
-                                f.write(f"input_device = \"{jsName}\"\n")
-                                f.write(f"input_vendor_id = \"{vendorId}\"\n")
-                                f.write(f"input_product_id = \"{productId}\"\n")
-                                #f.write("input_driver = \"udev\"\n")
-                                # buttons
-                                f.write(getRetroArchConfigButtonValue("input_a", c, sdl2.SDL_CONTROLLER_BUTTON_B))
-                                f.write(getRetroArchConfigButtonValue("input_b", c, sdl2.SDL_CONTROLLER_BUTTON_A))
-                                f.write(getRetroArchConfigButtonValue("input_x", c, sdl2.SDL_CONTROLLER_BUTTON_Y))
-                                f.write(getRetroArchConfigButtonValue("input_y", c, sdl2.SDL_CONTROLLER_BUTTON_X))
-                                f.write(getRetroArchConfigButtonValue("input_start", c, sdl2.SDL_CONTROLLER_BUTTON_START))
-                                f.write(getRetroArchConfigButtonValue("input_select", c, sdl2.SDL_CONTROLLER_BUTTON_BACK))
-                                # shoulder buttons
-                                f.write(getRetroArchConfigButtonValue("input_l", c, sdl2.SDL_CONTROLLER_BUTTON_LEFTSHOULDER))
-                                f.write(getRetroArchConfigButtonValue("input_r", c, sdl2.SDL_CONTROLLER_BUTTON_RIGHTSHOULDER))
-                                f.write(getRetroArchConfigAxisValue("input_l2", c, sdl2.SDL_CONTROLLER_AXIS_TRIGGERLEFT))
-                                f.write(getRetroArchConfigAxisValue("input_r2", c, sdl2.SDL_CONTROLLER_AXIS_TRIGGERRIGHT))
-                                # L3/R3 buttons
-                                f.write(getRetroArchConfigButtonValue("input_l3", c, sdl2.SDL_CONTROLLER_BUTTON_LEFTSTICK))
-                                f.write(getRetroArchConfigButtonValue("input_r3", c, sdl2.SDL_CONTROLLER_BUTTON_RIGHTSTICK))
-                                # d-pad buttons
-                                f.write(getRetroArchConfigButtonValue("input_up", c, sdl2.SDL_CONTROLLER_BUTTON_DPAD_UP))
-                                f.write(getRetroArchConfigButtonValue("input_down", c, sdl2.SDL_CONTROLLER_BUTTON_DPAD_DOWN))
-                                f.write(getRetroArchConfigButtonValue("input_left", c, sdl2.SDL_CONTROLLER_BUTTON_DPAD_LEFT))
-                                f.write(getRetroArchConfigButtonValue("input_right", c, sdl2.SDL_CONTROLLER_BUTTON_DPAD_RIGHT))
-                                # axis
-                                f.write(getRetroArchConfigAxisValue("input_l_x", c, sdl2.SDL_CONTROLLER_AXIS_LEFTX, True))
-                                f.write(getRetroArchConfigAxisValue("input_l_y", c, sdl2.SDL_CONTROLLER_AXIS_LEFTY, True))
-                                f.write(getRetroArchConfigAxisValue("input_r_x", c, sdl2.SDL_CONTROLLER_AXIS_RIGHTX, True))
-                                f.write(getRetroArchConfigAxisValue("input_r_y", c, sdl2.SDL_CONTROLLER_AXIS_RIGHTY, True))
-                                # hot key buttons
-                                bind = sdl2.SDL_GameControllerGetBindForButton(c, sdl2.SDL_CONTROLLER_BUTTON_GUIDE)
-                                if bind:
-                                    f.write(getRetroArchConfigButtonValue("input_enable_hotkey", c, sdl2.SDL_CONTROLLER_BUTTON_GUIDE))
-                                else:
-                                    f.write(getRetroArchConfigButtonValue("input_enable_hotkey", c, sdl2.SDL_CONTROLLER_BUTTON_BACK))
-                                f.write(getRetroArchConfigButtonValue("input_menu_toggle", c, sdl2.SDL_CONTROLLER_BUTTON_DPAD_UP))
-                                f.write(getRetroArchConfigButtonValue("input_exit_emulator", c, sdl2.SDL_CONTROLLER_BUTTON_START))
-                                f.write(getRetroArchConfigButtonValue("input_save_state", c, sdl2.SDL_CONTROLLER_BUTTON_A))
-                                f.write(getRetroArchConfigButtonValue("input_load_state", c, sdl2.SDL_CONTROLLER_BUTTON_B))
-                                f.write("input_pause_toggle = \"nul\"\n")
+                                f.write("".join(parts))
                         sdl2.SDL_GameControllerClose(c)
 
                 # now set-up RetroAchievements
@@ -440,15 +454,15 @@ class Backend(QObject):
                     f.write(s)
 
             # get emulator launch string
-            command = self.__consoleSettings.get(game.console.name, "command").replace("%%GAME%%", f"\"{game.path}\"")
+            command = self.__consoleSettings.get(consoleName, "command").replace("%%GAME%%", f"\"{game.path}\"")
             if not command:
-                logging.error("Backend.playGame: could not determine launch command for the %s console", game.console.name)
-                return { "result": False, "msg": f"Could not determine launch command for the {game.console.name} console" }
+                logging.error("Backend.playGame: could not determine launch command for the %s console", consoleName)
+                return { "result": False, "msg": f"Could not determine launch command for the {consoleName} console" }
             logging.debug("Backend.playGame: launch string: %s", command)
             self.__createCommandFile(command)
             logging.debug("Backend.playGame: updating play count for %s", game.name)
             game.playCount += 1
-            game.lastPlayed = datetime.datetime.now()
+            game.lastPlayed = int(time.time())
             session.add(game)
         logging.debug("Backend.playGame: done")
         self.close()
@@ -587,10 +601,9 @@ class PESGuiApplication(QGuiApplication):
         joystickTick = sdl2.timer.SDL_GetTicks()
 
         while self.__running:
-            events = sdl2.ext.get_events()
-            for event in events:
-                if event.type in [sdl2.SDL_CONTROLLERBUTTONUP, sdl2.SDL_CONTROLLERAXISMOTION]:
-                    pes.controlpad.ControlPadManager.processEvent(event)
+            pes.controlpad.ControlPadManager.processEvents()
+            # nothing else reads the SDL event queue
+            sdl2.SDL_FlushEvents(sdl2.SDL_FIRSTEVENT, sdl2.SDL_LASTEVENT)
 
             if sdl2.timer.SDL_GetTicks() - joystickTick > 1000:
                 tick = sdl2.timer.SDL_GetTicks()
@@ -136,6 +136,7 @@ def pes_main():
     # make directory for each support console
     logging.debug("connecting to database: %s", pes.userDb)
     pes.sql.connect(pes.userDb)
+    pes.sql.upgrade()
 
     with pes.sql.Session() as session:
         consoles = session.query(pes.sql.Console).all()
@@ -54,6 +54,17 @@ Rectangle {
         gameModel.append(game);
     }
 
+    function fetchMoreGames() {
+        if (!internal.moreGames) {
+            return;
+        }
+        var games = PES.getGamesPage(consoleObj.id, gameModel.count, true);
+        internal.moreGames = games.length == PES.gamesPageSize;
+        for (var i = 0; i < games.length; i++) {
+            addGame(games[i]);
+        }
+    }
+
     function forceActiveFocus() {
         menuView.forceActiveFocus();
     }
@@ -85,11 +96,14 @@ Rectangle {
 
     function refresh() {
         gameModel.clear();
+        internal.moreGames = false;
         var games = null;
         switch (menuModel.get(menuView.currentIndex).name) {
             case "Browse": {
-                games = PES.getGames(consoleObj.id, internal.useGameCache);
+                // only the first page is loaded here, the rest are added as the grid is scrolled
+                games = PES.getGamesPage(consoleObj.id, 0, internal.useGameCache);
                 internal.useGameCache = true;
+                internal.moreGames = games.length == PES.gamesPageSize;
                 break;
             }
             case "Recently Added": {
@@ -142,6 +156,7 @@ Rectangle {
         property bool useMostPlayedCache: false
         property bool useGameCache: false
         property bool useFavouriteCache: false;
+        property bool moreGames: false
     }
 
     RowLayout {
@@ -325,6 +340,12 @@ Rectangle {
                         model: gameModel
                         delegate: gridDelegate
 
+                        onAtYEndChanged: {
+                            if (atYEnd) {
+                                mainRect.fetchMoreGames();
+                            }
+                        }
+
                         Keys.onPressed: {
                             if (event.key == Qt.Key_Backspace || (event.key == Qt.Key_Left && currentIndex == 0)) {
                                 internal.gameIndex = currentIndex;
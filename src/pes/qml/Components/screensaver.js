@@ -32,7 +32,13 @@ function init(useCache) {
     if (games.length == 0) {
         const consoles = PES.getConsolesWithGames(useCache);
         for (var i = 0; i < consoles.length; i++) {
-            games.push.apply(games, PES.getGames(consoles[i].id, true));
+            var offset = 0;
+            var page = null;
+            do {
+                page = PES.getGamesPage(consoles[i].id, offset, true);
+                games.push.apply(games, page);
+                offset += page.length;
+            } while (page.length == PES.gamesPageSize);
         }
     }
 }
@@ -26,7 +26,8 @@ var consolesWithGamesCache = null;
 var recentlyAddedCache = {};
 var recentlyPlayedCache = {};
 var mostPlayedCache = {};
-var gamesCache = {};
+var gamesPageCache = {};
+var gamesPageSize = 200;
 var favouriteCache = {};
 var currentConsoleId = null;
 var gamesAdded = false;
@@ -68,11 +69,14 @@ function getFavouriteGames(consoleId, useCache) {
   return favouriteCache[consoleId];
 }
 
-function getGames(consoleId, useCache) {
-  if (!useCache || !(consoleId in gamesCache)) {
-    gamesCache[consoleId] = backend.getGames(consoleId);
+function getGamesPage(consoleId, offset, useCache) {
+  if (!useCache || !(consoleId in gamesPageCache)) {
+    gamesPageCache[consoleId] = {};
   }
-  return gamesCache[consoleId];
+  if (!(offset in gamesPageCache[consoleId])) {
+    gamesPageCache[consoleId][offset] = backend.getGames(consoleId, offset, gamesPageSize);
+  }
+  return gamesPageCache[consoleId][offset];
 }
 
 function getMostPlayedGames(consoleId, count, useCache) {
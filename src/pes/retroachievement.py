@@ -339,7 +339,7 @@ class RetroAchievementThread(QThread):
             pes.common.mkdir(badgeDir)
             if self.__retroGameId in RetroAchievementThread.__gameIdCache:
                 logging.debug("RetroAchievementThread.run: game ID cached")
-            elif len(self.__retroGame.badges) == 0 or (game.lastPlayed and self.__retroGame.syncDate < game.lastPlayed) or not game.lastPlayed:
+            elif len(self.__retroGame.badges) == 0 or (game.lastPlayed and self.__retroGame.syncDate.timestamp() < game.lastPlayed) or not game.lastPlayed:
                 logging.debug("RetroAchievementThread.run: loading live data from the Internet")
                 score = 0
                 maxScore = 0
@@ -28,7 +28,7 @@ This module provides classes and functions to process meta data for ROMS.
 
 # standard imports
 import abc
-import datetime
+import collections
 import glob
 import logging
 import multiprocessing
@@ -51,6 +51,10 @@ logging.getLogger("PIL").setLevel(logging.WARNING)
 logging.getLogger("requests").setLevel(logging.WARNING)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 
+# the Console values a RomTask needs, a tuple (rather than a Console
+# object) keeps the task small when it is pickled onto the task queue
+RomTaskConsole = collections.namedtuple("RomTaskConsole", ["id", "name", "retroId", "nocoverart"])
+
 class RomTaskResult():
 
     STATE_ADDED = 1
@@ -171,7 +175,7 @@ class RomTask(abc.ABC):
     URL_TIMEOUT = 30
     HEADERS = { "accept": "application/json", 'User-Agent': 'PES Scraper'}
 
-    def __init__(self, console: pes.sql.Console, rom: str, fullscan: bool = False):
+    def __init__(self, console: RomTaskConsole, rom: str, fullscan: bool = False):
         """
         @param    console        console
         @param    rom            path to ROM
@@ -205,9 +209,7 @@ class RomTask(abc.ABC):
         ratio = min(float(scaleWidth / width), float(scaleWidth / height))
         newWidth = width * ratio
         newHeight = height * ratio
-        if width > newWidth or height > newHeight:
-            # scale image
-            img.thumbnail((newWidth, newHeight), PIL.Image.Resampling.LANCZOS)
+        mustScale = width > newWidth or height > newHeight
         if imgFormat == "JPEG":
             extension = ".jpg"
         elif imgFormat == "PNG":
@@ -218,6 +220,14 @@ class RomTask(abc.ABC):
             imgFormat = "PNG"
             extension = ".png"
         newPath = f"{filename}{extension}"
+        if not mustScale and newPath == path:
+            # image is already the right size and format, so avoid decoding and re-encoding it
+            logging.debug("RomTask._scaleImage: %s does not need scaling", path)
+            img.close()
+            return path
+        if mustScale:
+            # scale image
+            img.thumbnail((newWidth, newHeight), PIL.Image.Resampling.LANCZOS)
         if newPath != path:
             logging.warning("RomTask._scaleImage: %s will be deleted and saved as %s due to incorrect image format", path, newPath)
             os.remove(path)
@@ -267,7 +277,7 @@ class GamesDbRomTask(RomTask):
                             gamesDbGame = retroGame.gamesDbGame[0]
                             game = pes.sql.Game( # pylint: disable=unexpected-keyword-arg
                                 consoleId=self._console.id,
-                                added=datetime.datetime.now(),
+                                added=int(time.time()),
                                 name=gamesDbGame.name,
                                 rasum=rasum,
                                 gamesDbId=gamesDbGame.id,
@@ -301,7 +311,7 @@ class GamesDbRomTask(RomTask):
 
                         game = pes.sql.Game( # pylint: disable=unexpected-keyword-arg
                             consoleId=self._console.id,
-                            added=datetime.datetime.now(),
+                            added=int(time.time()),
                             name=gamesDbGame.name,
                             rasum=rasum,
                             gamesDbId=gamesDbGame.id,
@@ -315,7 +325,7 @@ class GamesDbRomTask(RomTask):
                         logging.warning("%s could not find any match for %s", logPrefix, self._rom)
                         game = pes.sql.Game( # pylint: disable=unexpected-keyword-arg
                             consoleId=self._console.id,
-                            added=datetime.datetime.now(),
+                            added=int(time.time()),
                             name=romName,
                             rasum=rasum,
                             path=self._rom,
@@ -700,13 +710,14 @@ class RomScanThread(QThread):
             session.query(pes.sql.Game).update({pes.sql.Game.found: False})
         with pes.sql.Session(expire_on_commit=False) as session:
             # loop over all consoles
-            consoles = session.query(pes.sql.Console).all()
+            consoles = session.query(pes.sql.Console).options(*pes.sql.CONSOLE_PLATFORM_OPTIONS).all()
             for console in consoles:
                 if self.__consoleSettings.hasSection(console.name):
                     logging.debug("RomScanThread.run: processing console %s", console.name)
                     extensions = self.__consoleSettings.get(console.name, "extensions")
                     ignoreRoms = self.__consoleSettings.get(console.name, "ignore_roms")
                     logging.debug("RomScanThread.run: extensions for %s are: %s", console.name, ','.join(extensions))
+                    taskConsole = RomTaskConsole(console.id, console.name, console.retroId, console.nocoverart)
                     romFiles = []
                     for f in glob.glob(os.path.join(self.__romsDir, console.name, "*")):
                         if os.path.isfile(f):
@@ -716,7 +727,7 @@ class RomScanThread(QThread):
                                     platform = console.platform
                                     if platform is None:
                                         pes.common.pesExit(f"RomScanThread.run: no platform relationship with console ID: {console.id}")
-                                    self.__tasks.put(GamesDbRomTask(console, f, self.__fullscan))
+                                    self.__tasks.put(GamesDbRomTask(taskConsole, f, self.__fullscan))
 
                     consoleRomTotal = len(romFiles)
                     self.__romTotal += consoleRomTotal
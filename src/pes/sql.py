@@ -28,157 +28,386 @@ This module provides classes and functions for PES' database functionality.
 
 # standard imports
 from datetime import datetime
+from typing import Optional
+import functools
 import logging
+import operator
 import os
+import time
 
 # third-party imports
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import create_engine, Column, DateTime, ForeignKey, Integer, String, Text, Boolean
-from sqlalchemy.orm import class_mapper, relationship, sessionmaker, ColumnProperty
+from sqlalchemy import create_engine, event, select, text, DateTime, ForeignKey, Index, Integer, String, Text, Boolean
+from sqlalchemy.dialects.sqlite import insert as sqliteInsert
+from sqlalchemy.orm import class_mapper, joinedload, relationship, selectinload, sessionmaker, ColumnProperty, DeclarativeBase, Mapped, mapped_column
 
 # pes imports
 import pes
 
-Base = declarative_base()
+class Base(DeclarativeBase): # pylint: disable=too-few-public-methods
+    pass
+
 Session = None
 
-def connect(db=pes.userDb):
-    global Session # pylint: disable=global-statement
+def _setPragmas(dbapiConnection, connectionRecord): # pylint: disable=unused-argument
+    # WAL allows the GUI to read whilst the ROM scanner is writing
+    # note: foreign_keys is left off as gamesDbId and retroId use 0 for
+    # "no match", so inserts and updates never pay for foreign key checks
+    cursor = dbapiConnection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-20000")
+    cursor.close()
+
+@functools.lru_cache(maxsize=4)
+def _getEngine(db: str, pid: int): # pylint: disable=unused-argument
+    # the process ID is part of the cache key so that forked ROM scan
+    # processes create their own engine rather than sharing the parent's
+    # pooled connections
     # disable check_same_thread check
     # must make sure writes only happen in one thread!
     s = f"sqlite:///{db}?check_same_thread=false"
-    logging.debug("pes.sql.connect: connecting to: %s", s)
-    engine = create_engine(s)
-    Session = sessionmaker(bind=engine)
+    logging.debug("pes.sql._getEngine: connecting to: %s", s)
+    engine = create_engine(s, query_cache_size=1200, connect_args={ "timeout": 30 })
+    event.listen(engine, "connect", _setPragmas)
     Base.metadata.create_all(engine)
+    return engine
+
+def connect(db=pes.userDb):
+    global Session # pylint: disable=global-statement
+    # the engine (and its statement cache) is shared by every caller
+    engine = _getEngine(db, os.getpid())
+    if Session is None or Session.kw["bind"] is not engine:
+        Session = sessionmaker(bind=engine)
+
+# stored in the database's user_version pragma, increase this when
+# upgrade has something new to do to an existing database
+_SCHEMA_VERSION = 1
+
+def upgrade():
+    """
+    Brings the connected database up to date. This only needs to happen
+    once per database, so it is called at start up by main rather than
+    by every process that connects.
+    """
+    with Session.kw["bind"].begin() as conn:
+        version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+        if version >= _SCHEMA_VERSION:
+            return
+        logging.info("upgrading database from version %d to %d", version, _SCHEMA_VERSION)
+        # game dates used to be stored as DATETIME strings, convert any old
+        # values to unix timestamps (stored values are local time)
+        for column in ["added", "lastPlayed"]:
+            conn.execute(text(f"UPDATE game SET {column} = CAST(strftime('%s', {column}, 'utc') AS INTEGER) WHERE typeof({column}) = 'text'"))
+        # create_all does not add new indexes to existing tables
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        conn.exec_driver_sql(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+# strftime directives supported by _compileDateTimeFormat, the field
+# indexes match the arguments passed to str.format in CustomBase.getDateStr
+_DATE_TIME_FIELDS = {
+    "d": "{0:02d}",
+    "m": "{1:02d}",
+    "Y": "{2:04d}",
+    "y": "{3:02d}",
+    "H": "{4:02d}",
+    "M": "{5:02d}",
+    "S": "{6:02d}",
+    "%": "%"
+}
+
+def _compileDateTimeFormat(fmt: str) -> str:
+    """
+    Converts the given strftime format to a str.format template which
+    avoids strftime's format parsing and locale handling per call.
+    Returns None if the format contains an unsupported directive.
+    """
+    template = ""
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == "%":
+            if i + 1 == len(fmt) or fmt[i + 1] not in _DATE_TIME_FIELDS:
+                return None
+            template += _DATE_TIME_FIELDS[fmt[i + 1]]
+            i += 2
+        else:
+            template += fmt[i].replace("{", "{{").replace("}", "}}")
+            i += 1
+    return template
+
+@functools.lru_cache(maxsize=32)
+def _getNocoverartPath(nocoverart: str) -> str:
+    # there are only a few consoles, so cache the path for each one
+    return os.path.join(pes.imagesDir, nocoverart)
+
+def _fileExists(path: str, dirCache: dict=None) -> bool:
+    """
+    Returns True if the given file exists. If a dirCache dictionary is
+    given each directory is only listed once (via os.scandir) and the
+    result re-used, instead of calling stat() for every file.
+    """
+    if dirCache is None:
+        return os.path.exists(path)
+    directory, filename = os.path.split(path)
+    if directory not in dirCache:
+        try:
+            with os.scandir(directory) as entries:
+                dirCache[directory] = {entry.name for entry in entries}
+        except OSError:
+            dirCache[directory] = set()
+    return filename in dirCache[directory]
 
 class CustomBase:
 
     DATE_TIME_FORMAT = "%d/%m/%Y %H:%M"
+    # (format, template) - recompiled when DATE_TIME_FORMAT changes
+    _dateTimeTemplate = (None, None)
 
     def __init__(self) -> None:
         self.__table__ = None
 
+    @staticmethod
+    def __getDateTimeTemplate() -> tuple:
+        fmt, template = CustomBase._dateTimeTemplate
+        if fmt is not CustomBase.DATE_TIME_FORMAT:
+            fmt = CustomBase.DATE_TIME_FORMAT
+            template = _compileDateTimeFormat(fmt)
+            CustomBase._dateTimeTemplate = (fmt, template)
+        return fmt, template
+
     @staticmethod
     def getDateStr(column: datetime) -> str:
-        return column.strftime(CustomBase.DATE_TIME_FORMAT)
+        fmt, template = CustomBase.__getDateTimeTemplate()
+        if template is None:
+            return column.strftime(fmt)
+        return template.format(column.day, column.month, column.year, column.year % 100, column.hour, column.minute, column.second)
 
-    def getDict(self) -> dict:
-        j = {}
-        if self.__table__ is not None:
-            for prop in class_mapper(self.__class__).iterate_properties:
+    @staticmethod
+    def getTimestampStr(timestamp: int) -> str:
+        """
+        Formats the given unix timestamp as local time without creating
+        a datetime object.
+        """
+        fmt, template = CustomBase.__getDateTimeTemplate()
+        t = time.localtime(timestamp)
+        if template is None:
+            return time.strftime(fmt, t)
+        return template.format(t.tm_mday, t.tm_mon, t.tm_year, t.tm_year % 100, t.tm_hour, t.tm_min, t.tm_sec)
+
+    @classmethod
+    def bulkInsert(cls, session, rows: list):
+        """
+        Inserts the given list of column dictionaries in one executemany
+        call, bypassing the ORM unit of work.
+        """
+        if rows:
+            session.bulk_insert_mappings(cls, rows)
+
+    @classmethod
+    def getColumnSpec(cls) -> tuple:
+        """
+        Returns a tuple of (key, isDateTime, default) tuples for each
+        column of this class. The tuple is created once per class.
+        """
+        spec = cls.__dict__.get("_columnSpec")
+        if spec is None:
+            defaults = { DateTime: 0, Integer: 0, Boolean: False }
+            spec = []
+            for prop in class_mapper(cls).iterate_properties:
                 if isinstance(prop, ColumnProperty):
-                    val = getattr(self, prop.key)
                     t = type(prop.columns[0].type)
-                    if val:
-                        if t is DateTime:
-                            j[prop.key] = int(val.timestamp())
-                        else:
-                            j[prop.key] = val
-                    else:
-                        if t is DateTime:
-                            j[prop.key] = 0
-                        elif t is Integer:
-                            j[prop.key] = 0
-                        elif t is Boolean:
-                            j[prop.key] = False
-                        else:
-                            j[prop.key] = ""
+                    spec.append((prop.key, t is DateTime, defaults.get(t, "")))
+            spec = tuple(spec)
+            cls._columnSpec = spec
+            cls._dictSpec = (
+                # fetches all column values in one call for getDict
+                operator.attrgetter(*[key for key, _, _ in spec]),
+                tuple((key, default) for key, _, default in spec),
+                tuple(key for key, isDateTime, _ in spec if isDateTime)
+            )
+        return spec
+
+    @classmethod
+    def getDictSpec(cls) -> tuple:
+        """
+        Returns a (columnGetter, columnDefaults, dateTimeKeys) tuple used
+        to build the dictionaries returned by getDict.
+        """
+        cls.getColumnSpec()
+        return cls._dictSpec
+
+    def getDict(self) -> dict:
+        if self.__table__ is None:
+            return {}
+        columnGetter, columnDefaults, dateTimeKeys = self.getDictSpec()
+        j = { key: val or default for (key, default), val in zip(columnDefaults, columnGetter(self)) }
+        for key in dateTimeKeys:
+            if j[key]:
+                j[key] = int(j[key].timestamp())
         return j
 
     def __repr__(self) -> str:
-        vals = []
-        for prop in class_mapper(self.__class__).iterate_properties:
-            if isinstance(prop, ColumnProperty):
-                vals.append(f"{prop.key}={getattr(self, prop.key)}")
+        vals = [f"{key}={getattr(self, key)}" for key, _, _ in self.getColumnSpec()]
         return f"<{self.__class__.__name__} {' '.join(vals)} >"
 
 class Console(Base, CustomBase):
     __tablename__ = "console"
 
-    id = Column(Integer, primary_key=True)
-    name = Column(String)
-    gamesDbId = Column(Integer, ForeignKey('gamesdb_platform.id')) # FBA and MAMA use the same ID
-    retroId = Column(Integer, ForeignKey('retroachievement_console.id'), default=0) # Mega Drive & Gensis use same ID
-    nocoverart = Column(String)
-    art = Column(String)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(String)
+    gamesDbId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('gamesdb_platform.id'), index=True) # FBA and MAMA use the same ID
+    retroId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('retroachievement_console.id'), index=True, default=0) # Mega Drive & Gensis use same ID
+    nocoverart: Mapped[Optional[str]] = mapped_column(String)
+    art: Mapped[Optional[str]] = mapped_column(String)
 
-    platform = relationship("GamesDbPlatform", back_populates="consoles")
+    # only needed when scanning ROMs, callers must use CONSOLE_PLATFORM_OPTIONS
+    platform = relationship("GamesDbPlatform", back_populates="consoles", lazy="raise")
     #retroAchievementConsole = relationship("RetroAchievementConsole", back_populates="consoles")
 
 class Game(Base, CustomBase):
     __tablename__ = "game"
 
-    id = Column(Integer, primary_key=True)
-    name = Column(Text)
-    consoleId = Column(Integer, ForeignKey('console.id'))
-    rasum = Column(String, index=True, default=0)
-    gamesDbId = Column(Integer, ForeignKey('gamesdb_game.id'), index=True, default=0)
-    retroId = Column(Integer, ForeignKey('retroachievement_game.id'), index=True, default=0)
-    path = Column(Text)
-    coverartFront = Column(Text)
-    coverartBack = Column(Text)
-    lastPlayed = Column(DateTime)
-    added = Column(DateTime)
-    favourite = Column(Boolean, default=False)
-    playCount = Column(Integer, default=0)
-    fileSize = Column(Integer, default=0)
-    found = Column(Boolean, default=False)
-
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(Text)
+    consoleId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('console.id')) # indexed by the composite game indexes below
+    rasum: Mapped[Optional[str]] = mapped_column(String, index=True, default=0)
+    gamesDbId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('gamesdb_game.id'), index=True, default=0)
+    retroId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('retroachievement_game.id'), index=True, default=0)
+    path: Mapped[Optional[str]] = mapped_column(Text)
+    coverartFront: Mapped[Optional[str]] = mapped_column(Text)
+    coverartBack: Mapped[Optional[str]] = mapped_column(Text)
+    lastPlayed: Mapped[Optional[int]] = mapped_column(Integer, default=0) # unix timestamp
+    added: Mapped[Optional[int]] = mapped_column(Integer, default=0) # unix timestamp
+    favourite: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    playCount: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    fileSize: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    found: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+
+    # console and gamesDbGame are always needed by getDict, so load them
+    # with the game to avoid a SELECT per game when building lists
     console = relationship("Console", back_populates="games")
     gamesDbGame = relationship("GamesDbGame", back_populates="games")
     retroAchievementGame = relationship("RetroAchievementGame", back_populates="games")
 
-    def getDict(self) -> dict:
-        j = super().getDict()
+    @staticmethod
+    def selectDicts(session, *criteria, orderBy=None, limit: int=0, offset: int=0) -> list: # pylint: disable=too-many-locals
+        """
+        Returns a list of dictionaries (see getDict) for the games
+        matching the given criteria. The lists are read-only, so rows
+        are fetched with a Core select instead of being loaded as ORM
+        objects, and screenshots are fetched with one extra query.
+        Cover art directories are only listed once for the whole list.
+        orderBy may be a single clause or a tuple of clauses.
+        """
+        _, columnDefaults, dateTimeKeys = Game.getDictSpec()
+        stmt = select(
+            *Game.__table__.c,
+            Console.nocoverart,
+            GamesDbGame.id.label("gamesDbGameId"),
+            GamesDbGame.overview,
+            GamesDbGame.releaseDate
+        ).join(Console, Game.consoleId == Console.id).outerjoin(GamesDbGame, Game.gamesDbId == GamesDbGame.id).where(*criteria)
+        if orderBy is not None:
+            stmt = stmt.order_by(*orderBy) if isinstance(orderBy, tuple) else stmt.order_by(orderBy)
+        if limit > 0:
+            stmt = stmt.limit(limit)
+        if offset > 0:
+            stmt = stmt.offset(offset)
+        rows = session.execute(stmt).all()
+        screenshots = {}
+        ids = [row.id for row in rows]
+        # same batch size as selectinload, to stay within SQLite's bound parameter limit
+        for i in range(0, len(ids), 500):
+            for gameId, path in session.execute(select(GameScreenshot.gameId, GameScreenshot.path).where(GameScreenshot.gameId.in_(ids[i:i + 500])).order_by(GameScreenshot.id)):
+                screenshots.setdefault(gameId, []).append(path)
+        dirCache = {}
+        games = []
+        for row in rows:
+            m = row._mapping # pylint: disable=protected-access
+            j = { key: m[key] or default for key, default in columnDefaults }
+            for key in dateTimeKeys:
+                if j[key]:
+                    j[key] = int(j[key].timestamp())
+            games.append(Game.__completeDict(
+                j,
+                row.nocoverart,
+                (row.overview, row.releaseDate) if row.gamesDbGameId is not None else None,
+                playCount=row.playCount,
+                path=row.path,
+                screenshots=screenshots.get(row.id, []),
+                dirCache=dirCache
+            ))
+        return games
+
+    def getDict(self, dirCache: dict=None) -> dict:
+        gamesDbGame = None
         if self.gamesDbGame:
-            j["overview"] = self.gamesDbGame.overview
-            j["releaseDate"] = self.gamesDbGame.releaseDate
+            gamesDbGame = (self.gamesDbGame.overview, self.gamesDbGame.releaseDate)
+        return Game.__completeDict(
+            super().getDict(),
+            self.console.nocoverart,
+            gamesDbGame,
+            playCount=self.playCount,
+            path=self.path,
+            screenshots=[screenshot.path for screenshot in self.screenshots],
+            dirCache=dirCache
+        )
+
+    @staticmethod
+    def __completeDict(j: dict, nocoverart: str, gamesDbGame: tuple, *, playCount: int, path: str, screenshots: list, dirCache: dict) -> dict: # pylint: disable=too-many-arguments
+        """
+        Adds the values derived from the game's columns and relations
+        to the given column dictionary. gamesDbGame is an (overview,
+        releaseDate) tuple, or None if the game has no GamesDb match.
+        """
+        if gamesDbGame:
+            j["overview"], j["releaseDate"] = gamesDbGame
         else:
             j["overview"] = ""
             j["releaseDate"] = "N/A"
         if j["added"] > 0:
-            j["addedStr"] = self.getDateStr(self.added)
+            j["addedStr"] = CustomBase.getTimestampStr(j["added"])
         else:
             j["addedStr"] = "Unknown"
         if j["lastPlayed"] > 0:
-            j["lastPlayedStr"] = self.getDateStr(self.lastPlayed)
-        elif self.playCount == 0:
+            j["lastPlayedStr"] = CustomBase.getTimestampStr(j["lastPlayed"])
+        elif playCount == 0:
             j["lastPlayedStr"] = "Not played"
         else:
             j["lastPlayedStr"] = "Unknown"
-        if not os.path.exists(j["coverartFront"]):
-            logging.warning("%s does not exist!", self.coverartFront)
-            j["coverartFront"] = os.path.join(pes.imagesDir, self.console.nocoverart)
-        j["filename"] = os.path.basename(self.path)
-        j["screenshots"] = []
-        for screenshot in self.screenshots:
-            j["screenshots"].append(screenshot.path)
+        if not _fileExists(j["coverartFront"], dirCache):
+            logging.warning("%s does not exist!", j["coverartFront"])
+            j["coverartFront"] = _getNocoverartPath(nocoverart)
+        j["filename"] = os.path.basename(path)
+        j["screenshots"] = screenshots
         return j
 
 class GameScreenshot(Base, CustomBase):
     __tablename__ = "game_screenshot"
-    id = Column(Integer, primary_key=True)
-    gameId = Column(Integer, ForeignKey('game.id'), index=True)
-    path = Column(Text)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    gameId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('game.id'), index=True)
+    path: Mapped[Optional[str]] = mapped_column(Text)
 
     game = relationship("Game", back_populates="screenshots")
 
 class GamesDbGame(Base, CustomBase):
     __tablename__ = "gamesdb_game"
 
-    id = Column(Integer, primary_key=True)
-    platformId = Column(Integer, ForeignKey('gamesdb_platform.id'), index=True)
-    retroId = Column(Integer, ForeignKey('retroachievement_game.id'), index=True)
-    name = Column(Text)
-    releaseDate = Column(String)
-    overview = Column(Text)
-    boxArtBackOriginal = Column(Text)
-    boxArtBackMedium = Column(Text)
-    boxArtBackLarge = Column(Text)
-    boxArtFrontOriginal = Column(Text)
-    boxArtFrontMedium = Column(Text)
-    boxArtFrontLarge = Column(Text)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    platformId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('gamesdb_platform.id'), index=True)
+    retroId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('retroachievement_game.id'), index=True)
+    name: Mapped[Optional[str]] = mapped_column(Text)
+    releaseDate: Mapped[Optional[str]] = mapped_column(String)
+    overview: Mapped[Optional[str]] = mapped_column(Text)
+    boxArtBackOriginal: Mapped[Optional[str]] = mapped_column(Text)
+    boxArtBackMedium: Mapped[Optional[str]] = mapped_column(Text)
+    boxArtBackLarge: Mapped[Optional[str]] = mapped_column(Text)
+    boxArtFrontOriginal: Mapped[Optional[str]] = mapped_column(Text)
+    boxArtFrontMedium: Mapped[Optional[str]] = mapped_column(Text)
+    boxArtFrontLarge: Mapped[Optional[str]] = mapped_column(Text)
 
     platform = relationship("GamesDbPlatform", back_populates="games")
     retroAchievementGame = relationship("RetroAchievementGame", back_populates="gamesDbGame")
@@ -186,40 +415,40 @@ class GamesDbGame(Base, CustomBase):
 class GamesDbPlatform(Base, CustomBase):
     __tablename__ = "gamesdb_platform"
 
-    id = Column(Integer, primary_key=True)
-    name = Column(String)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(String)
 
 class GamesDbScreenshot(Base, CustomBase):
     __tablename__ = "gamesdb_screenshot"
-    id = Column(Integer, primary_key=True)
-    gameId = Column(Integer, ForeignKey('gamesdb_game.id'), index=True)
-    original = Column(Text)
-    medium = Column(Text)
-    large = Column(Text)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    gameId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('gamesdb_game.id'), index=True)
+    original: Mapped[Optional[str]] = mapped_column(Text)
+    medium: Mapped[Optional[str]] = mapped_column(Text)
+    large: Mapped[Optional[str]] = mapped_column(Text)
 
     game = relationship("GamesDbGame", back_populates="screenshots")
 
 class MameGame(Base, CustomBase):
     __tablename__ = "mame_game"
 
-    shortName = Column(String, primary_key=True)
-    name = Column(String)
+    shortName: Mapped[str] = mapped_column(String, primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(String)
 
 class RetroAchievementBadge(Base, CustomBase):
     __tablename__ = "retroachievement_badge"
-    id = Column(Integer, primary_key=True)
-    retroGameId = Column(Integer, ForeignKey("retroachievement_game.id"))
-    name = Column(Text)
-    title = Column(Text)
-    description = Column(Text)
-    points = Column(Integer)
-    lockedPath = Column(Text, default="")
-    unlockedPath = Column(Text, default="")
-    earned = Column(DateTime)
-    earnedHardcore = Column(DateTime)
-    displayOrder = Column(Integer)
-    totalAwarded = Column(Integer, default=0)
-    totalAwardedHardcore = Column(Integer, default=0)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    retroGameId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("retroachievement_game.id"), index=True)
+    name: Mapped[Optional[str]] = mapped_column(Text)
+    title: Mapped[Optional[str]] = mapped_column(Text)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    points: Mapped[Optional[int]] = mapped_column(Integer)
+    lockedPath: Mapped[Optional[str]] = mapped_column(Text, default="")
+    unlockedPath: Mapped[Optional[str]] = mapped_column(Text, default="")
+    earned: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    earnedHardcore: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    displayOrder: Mapped[Optional[int]] = mapped_column(Integer)
+    totalAwarded: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    totalAwardedHardcore: Mapped[Optional[int]] = mapped_column(Integer, default=0)
 
     game = relationship("RetroAchievementGame", back_populates="badges")
 
@@ -237,32 +466,41 @@ class RetroAchievementBadge(Base, CustomBase):
 
 class RetroAchievementConsole(Base, CustomBase):
     __tablename__ = "retroachievement_console"
-    id = Column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
     console = relationship("Console", back_populates="retroAchievementConsoles")
 
 class RetroAchievementGame(Base, CustomBase):
     __tablename__ = "retroachievement_game"
-    id = Column(Integer, primary_key=True)
-    name = Column(Text)
-    retroConsoleId = Column(Integer, ForeignKey('retroachievement_console.id'))
-    score = Column(Integer, default=0)
-    maxScore = Column(Integer, default=0)
-    totalPlayers = Column(Integer, default=0)
-    totalPlayersHardcore = Column(Integer, default=0)
-    syncDate = Column(DateTime)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(Text)
+    retroConsoleId: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('retroachievement_console.id'), index=True)
+    score: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    maxScore: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    totalPlayers: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    totalPlayersHardcore: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    syncDate: Mapped[Optional[datetime]] = mapped_column(DateTime)
 
     console = relationship("RetroAchievementConsole", back_populates="games")
 
 class RetroAchievementGameHash(Base, CustomBase):
     __tablename__ = "retroachievement_game_hash"
-    id = Column(Integer, ForeignKey('retroachievement_game.id'), primary_key=True)
-    rasum = Column(String, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, ForeignKey('retroachievement_game.id'), primary_key=True)
+    rasum: Mapped[str] = mapped_column(String, primary_key=True, index=True) # ROM scans look up games by rasum alone
 
     game = relationship("RetroAchievementGame", back_populates="hashes")
 
+    @classmethod
+    def upsertMany(cls, session, rows: list):
+        """
+        Inserts the given list of column dictionaries in one statement,
+        hashes which are already in the database are left alone.
+        """
+        if rows:
+            session.execute(sqliteInsert(cls).on_conflict_do_nothing(index_elements=["id", "rasum"]), rows)
+
 Console.games = relationship("Game", order_by=Game.id, back_populates="console")
-Console.retroAchievementConsoles = relationship("RetroAchievementConsole", order_by=RetroAchievementConsole.id, back_populates="console")
+Console.retroAchievementConsoles = relationship("RetroAchievementConsole", order_by=RetroAchievementConsole.id, back_populates="console", lazy="raise")
 Game.screenshots = relationship("GameScreenshot", order_by=GameScreenshot.id, back_populates="game", cascade="all,delete")
 GamesDbGame.games = relationship("Game", order_by=Game.id, back_populates="gamesDbGame")
 GamesDbGame.screenshots = relationship("GamesDbScreenshot", order_by=GamesDbScreenshot.id, back_populates="game")
@@ -274,3 +512,24 @@ RetroAchievementGame.badges = relationship("RetroAchievementBadge", order_by=Ret
 RetroAchievementGame.games = relationship("Game", order_by=Game.id, back_populates="retroAchievementGame")
 RetroAchievementGame.gamesDbGame = relationship("GamesDbGame", order_by=GamesDbGame.id, back_populates="retroAchievementGame")
 RetroAchievementGame.hashes = relationship("RetroAchievementGameHash", order_by=RetroAchievementGameHash.rasum, back_populates="game")
+
+# loader options are created once here and re-used by each query
+
+# loader options for queries that need Console.platform
+CONSOLE_PLATFORM_OPTIONS = (selectinload(Console.platform),)
+
+# loader options for queries whose results are passed to Game.getDict:
+# only the columns getDict uses are selected from the joined tables
+GAME_DICT_OPTIONS = (
+    joinedload(Game.console).load_only(Console.nocoverart),
+    joinedload(Game.gamesDbGame).load_only(GamesDbGame.overview, GamesDbGame.releaseDate),
+    selectinload(Game.screenshots)
+)
+
+# launching a game only needs its console's name
+GAME_PLAY_OPTIONS = (joinedload(Game.console).load_only(Console.name),)
+
+# indexes for the GUI's game list queries
+Index("ix_game_console_lastplayed", Game.consoleId, Game.lastPlayed.desc())
+# partial index: only favourite games are stored in it
+Index("ix_game_favourite", Game.consoleId, Game.name, sqlite_where=Game.favourite == True) # pylint: disable=singleton-comparison
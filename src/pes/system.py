@@ -31,8 +31,7 @@ to adjust Bluetooth and date/time settings.
 import logging
 
 # third-party imports
-from dbus.mainloop.pyqt5 import DBusQtMainLoop # pylint: disable=import-error
-from PyQt5.QtCore import Q_CLASSINFO, QObject, QVariant, pyqtProperty, pyqtSlot, QMetaType
+from PyQt5.QtCore import Q_CLASSINFO, QObject, QTimer, QVariant, pyqtProperty, pyqtSlot, QMetaType
 from PyQt5.QtDBus import QDBusArgument, QDBusConnection, QDBusAbstractAdaptor, QDBusInterface, QDBusVariant, QDBusMessage, QDBusObjectPath, QDBusError
 
 BT_SERVICE = "org.bluez"
@@ -49,7 +48,7 @@ DBUS_PROPERTIES_INTERFACE = "org.freedesktop.DBus.Properties"
 PS3_CONTROLLER = "Sony PLAYSTATION(R)3 Controller"
 WII_CONTROLLER = "Nintendo RVL-CNT-01"
 WIRELESS_CONTROLLER = "Wireless Controller"
-CONTROLLERS = [WII_CONTROLLER, PS3_CONTROLLER, WIRELESS_CONTROLLER]
+CONTROLLERS = frozenset((WII_CONTROLLER, PS3_CONTROLLER, WIRELESS_CONTROLLER))
 
 class BluetoothAdapter(QDBusAbstractAdaptor):
 
@@ -69,20 +68,18 @@ class BluetoothAdapter(QDBusAbstractAdaptor):
     #    <arg direction=\"out\" type=\"s\"/>"
     #</method>
 
-    def __init__(self, parent=None):
+    def __init__(self, broker, parent=None):
         super().__init__(parent)
         #self._devicePINTries = {}
-        DBusQtMainLoop(set_as_default=True)
         self._bus = QDBusConnection.systemBus()
+        self._broker = broker
         self.setAutoRelaySignals(True)
 
     @pyqtSlot(QDBusMessage)
     def AuthorizeService(self, message):
         # only automatically accept PS3 control pads
         device, service = message.arguments()
-        connection = QDBusInterface(BT_SERVICE, device, DBUS_PROPERTIES_INTERFACE, self._bus)
-        alias = connection.call("Get", BT_DEVICE_INTERFACE, "Alias").arguments()[0]
-        #address = connection.call("Get", BT_DEVICE_INTERFACE, "Address").arguments()[0]
+        alias = self._broker.getBtDeviceAlias(device)
         if alias in CONTROLLERS:
             # authorized
             logging.info("BluetoothAdapter.AuthorizeService: authorized %s %s", alias, device)
@@ -95,10 +92,10 @@ class BluetoothAdapter(QDBusAbstractAdaptor):
     #@pyqtSlot(QDBusMessage, result=str)
     #def RequestPinCode(self, message):
     #    device = message.arguments()[0]
-    #    logging.debug("BluetoothAdapter.RequestPinCode: device = %s" % device)
+    #    logging.debug("BluetoothAdapter.RequestPinCode: device = %s", device)
     #    if device in self._devicePINTries:
     #        if self._devicePINTries[device] == len(self._PINS):
-    #            logging.debug("BluetoothAdapter.RequestPinCode: PIN tries exhausted for %s" % device)
+    #            logging.debug("BluetoothAdapter.RequestPinCode: PIN tries exhausted for %s", device)
     #            error = message.createErrorReply(QDBusError.AccessDenied, "Failed")
     #            self._bus.send(error)
     #            return None
@@ -106,7 +103,7 @@ class BluetoothAdapter(QDBusAbstractAdaptor):
     #        self._devicePINTries[device] = 0
     #    pin = self._PINS[self._devicePINTries[device]]
     #    self._devicePINTries[device] += 1
-    #    logging.debug("BluetoothAdapter.RequestPinCode: trying PIN %s" % pin)
+    #    logging.debug("BluetoothAdapter.RequestPinCode: trying PIN %s", pin)
     #    message.createReply(pin)
     #    return pin
 
@@ -114,23 +111,33 @@ class BluetoothAgent(QObject):
 
     PATH = "/com/mundayweb/pes/agent"
 
-    def __init__(self, parent=None):
+    def __init__(self, broker, parent=None):
         super().__init__(parent)
         self._bus = QDBusConnection.systemBus()
-        self._apdater = BluetoothAdapter(self)
-        agentManager = QDBusInterface(BT_SERVICE, "/org/bluez", "org.bluez.AgentManager1", self._bus, self)
+        self._apdater = BluetoothAdapter(broker, self)
+        self._agentManager = QDBusInterface(BT_SERVICE, "/org/bluez", "org.bluez.AgentManager1", self._bus, self)
         if not self._bus.registerObject(BluetoothAgent.PATH, self):
             raise Exception("BluetoothAgent.__init__: failed to register object")
         logging.debug("BluetoothAgent.__init__: registered object")
-        msg = agentManager.call("RegisterAgent", QDBusObjectPath(BluetoothAgent.PATH), "DisplayYesNo")
+        self._registered = False
+        msg = self._agentManager.call("RegisterAgent", QDBusObjectPath(BluetoothAgent.PATH), "DisplayYesNo")
         if msg.type() == QDBusMessage.ErrorMessage:
             logging.warning("DbusBroker.__init__: Failed to register Bluetooth agent: %s", msg.errorMessage())
         else:
-            result = agentManager.call("RequestDefaultAgent", QDBusObjectPath(BluetoothAgent.PATH)).arguments()
+            self._registered = True
+            result = self._agentManager.call("RequestDefaultAgent", QDBusObjectPath(BluetoothAgent.PATH)).arguments()
             if result[0] is not None:
                 raise Exception(f"BluetoothAgent.__init__: failed to register default agent: {result[0]}")
 
-class DbusBroker(QObject):
+    def unregister(self):
+        logging.debug("BluetoothAgent.unregister: unregistering agent")
+        if self._registered:
+            self._agentManager.call("UnregisterAgent", QDBusObjectPath(BluetoothAgent.PATH))
+            self._registered = False
+        self._bus.unregisterObject(BluetoothAgent.PATH)
+
+# the extra attributes are the D-Bus caches and the property change batching state
+class DbusBroker(QObject): # pylint: disable=too-many-instance-attributes
     """
     A helper class to manage system devices and properties
     """
@@ -140,50 +147,100 @@ class DbusBroker(QObject):
         self._bus = QDBusConnection.systemBus()
         self._adapterPath = None
         self.__timezones = None
+        # QDBusInterface introspects the remote object when created,
+        # so each (service, path, interface) proxy is only created once
+        self.__interfaces = {}
+        # device path -> org.bluez.Device1 properties, kept up to date by
+        # the InterfacesAdded, InterfacesRemoved and PropertiesChanged signals
+        self.__devices = {}
+        # QVariant returned by getBtGamingDevices, None when out of date
+        self.__gamingDevices = None
+        # BlueZ sends a PropertiesChanged signal for every RSSI update
+        # whilst discovering, so changes are merged and handled in batches
+        self.__pendingChanges = {}
+        self.__propertyChangeTimer = QTimer(self)
+        self.__propertyChangeTimer.setSingleShot(True)
+        self.__propertyChangeTimer.setInterval(250)
+        self.__propertyChangeTimer.timeout.connect(self.__processPropertyChanges)
+        # signal subscriptions (connect arguments), released by close()
+        self.__signals = []
         # look for Bluez service
-        bluezFound = False
-        for service in self._bus.interface().registeredServiceNames().value():
-            if service == BT_SERVICE:
-                bluezFound = True
-                break
-
-        if bluezFound:
-            self._adapterPath = self._getBtAdapter()
+        if self._bus.interface().isServiceRegistered(BT_SERVICE).value():
+            # one GetManagedObjects call finds the adapter and the known devices
+            self._adapterPath = self._loadBtObjects()
             if self._adapterPath is None:
                 logging.warning("DbusBroker.__init__: could not find BT adapter")
             else:
                 logging.debug("DbusBroker.__init__: found BT adapter %s", self._adapterPath)
-                # listen for devices being added
-                if not self._bus.connect("", "", "org.freedesktop.DBus.ObjectManager", "InterfacesAdded", self.btDeviceAdded):
+                # listen for devices being added (BlueZ's object manager is at "/")
+                if not self.__connectSignal(BT_SERVICE, "/", "org.freedesktop.DBus.ObjectManager", "InterfacesAdded", self.btDeviceAdded):
                     raise Exception("DbusBroker.__init__: failed to connect to org.freedesktop.DBus.ObjectManager:InterfacesAdded")
-                # listen for all Bluez related property changes
-                if not self._bus.connect(BT_SERVICE, "", DBUS_PROPERTIES_INTERFACE, "PropertiesChanged", self.btPropertyChange):
+                # listen for devices being removed so that their proxies can be released
+                if not self.__connectSignal(BT_SERVICE, "/", "org.freedesktop.DBus.ObjectManager", "InterfacesRemoved", self.btDeviceRemoved):
+                    raise Exception("DbusBroker.__init__: failed to connect to org.freedesktop.DBus.ObjectManager:InterfacesRemoved")
+                # listen for Bluez device property changes only (arg0 is the interface name)
+                if not self.__connectSignal(BT_SERVICE, "", DBUS_PROPERTIES_INTERFACE, "PropertiesChanged", [BT_DEVICE_INTERFACE], "", self.btPropertyChange):
                     raise Exception(f"DbusBroker.__init__: failed to connected to org.freedesktop.DBus.Properties:PropertiesChanged for {BT_SERVICE}")
         else:
             logging.warning("DbusBroker.__init__: could not find %s", BT_SERVICE)
 
-    def _getBtAdapter(self):
+    def __connectSignal(self, *args) -> bool:
+        if self._bus.connect(*args):
+            self.__signals.append(args)
+            return True
+        return False
+
+    def close(self):
+        """
+        Disconnects all signals and releases the cached interfaces so
+        that no match rules are left behind on the system bus.
+        """
+        logging.debug("DbusBroker.close: disconnecting %d signals", len(self.__signals))
+        self.__propertyChangeTimer.stop()
+        for args in self.__signals:
+            self._bus.disconnect(*args)
+        self.__signals = []
+        self.__interfaces.clear()
+
+    def _getInterface(self, path: str, interface: str, service: str=BT_SERVICE) -> QDBusInterface:
+        key = (service, path, interface)
+        connection = self.__interfaces.get(key)
+        if connection is None:
+            connection = QDBusInterface(service, path, interface, self._bus)
+            self.__interfaces[key] = connection
+        return connection
+
+    def _send(self, path: str, interface: str, method: str, *args):
+        # fire and forget, no reply is expected or waited for
+        msg = QDBusMessage.createMethodCall(BT_SERVICE, path, interface, method)
+        msg.setArguments(list(args))
+        if not self._bus.send(msg):
+            logging.warning("DbusBroker._send: failed to send %s.%s to %s", interface, method, path)
+
+    def _loadBtObjects(self):
         adapterPath = None
-        connection = QDBusInterface(BT_SERVICE, "/", "org.freedesktop.DBus.ObjectManager", self._bus)
+        connection = self._getInterface("/", "org.freedesktop.DBus.ObjectManager")
         msg = connection.call("GetManagedObjects")
         if msg.type() == QDBusMessage.ErrorMessage:
-            logging.warning("DbusBroker._getBtAdapter: %s", msg.errorMessage())
+            logging.warning("DbusBroker._loadBtObjects: %s", msg.errorMessage())
         else:
-            for path, value in msg.arguments()[0].items():
+            managedObjects = msg.arguments()[0]
+            for path, value in managedObjects.items():
                 if BT_ADAPTER_INTERFACE in value:
                     adapterPath = path
                     break
+            self.__addDevices(managedObjects)
         return adapterPath
 
     def _getBtAdapterProperty(self, prop):
         if self._adapterPath:
-            connection = QDBusInterface(BT_SERVICE, self._adapterPath, DBUS_PROPERTIES_INTERFACE, self._bus)
+            connection = self._getInterface(self._adapterPath, DBUS_PROPERTIES_INTERFACE)
             return connection.call("Get", BT_ADAPTER_INTERFACE, prop).arguments()[0]
         raise Exception("DbusBroker._getBtAdapterProperty: Bluetooth adapter not found")
 
     def _setBtAdapterProperty(self, prop, value):
         if self._adapterPath:
-            connection = QDBusInterface(BT_SERVICE, self._adapterPath, DBUS_PROPERTIES_INTERFACE, self._bus)
+            connection = self._getInterface(self._adapterPath, DBUS_PROPERTIES_INTERFACE)
             if isinstance(value, int):
                 # convert integer properties to UInt32
                 rslt = connection.call("Set", BT_ADAPTER_INTERFACE, prop, QDBusVariant(QDBusArgument(value, QMetaType.UInt))).arguments()
@@ -195,7 +252,7 @@ class DbusBroker(QObject):
         raise Exception(f"DbusBroker._setBtAdapterProperty: Bluetooth adapter not found when seting '{prop}'")
 
     def _getTimedateConnection(self, interface=TIMEDATE_INTERFACE):
-        return QDBusInterface(TIMEDATE_SERVICE, TIMEDATE_PATH, interface, self._bus)
+        return self._getInterface(TIMEDATE_PATH, interface, TIMEDATE_SERVICE)
 
     def _getTimedateProperty(self, prop):
         return self._getTimedateConnection(DBUS_PROPERTIES_INTERFACE).call("Get", TIMEDATE_INTERFACE, prop).arguments()[0]
@@ -208,34 +265,57 @@ class DbusBroker(QObject):
     @pyqtSlot(QDBusMessage)
     def btDeviceAdded(self, message):
         args = message.arguments()
-        if "org.bluez.Device1" in args[1]:
+        if BT_DEVICE_INTERFACE in args[1]:
             device = args[0]
             logging.debug("DbusBroker.btDeviceAdded: detected device %s", device)
-            connection = QDBusInterface(BT_SERVICE, device, DBUS_PROPERTIES_INTERFACE, self._bus)
-            alias = connection.call("Get", BT_DEVICE_INTERFACE, "Alias").arguments()[0]
-            address = connection.call("Get", BT_DEVICE_INTERFACE, "Address").arguments()[0]
+            # the signal already contains all of the device's properties
+            properties = dict(args[1][BT_DEVICE_INTERFACE])
+            self.__devices[device] = properties
+            self.__gamingDevices = None
+            alias = properties.get("Alias")
+            address = properties.get("Address")
             logging.debug("DbusBroker.btDeviceAdded: alias = %s, address = %s ", alias, address)
             if alias in CONTROLLERS:
-                if connection.call("Get", BT_DEVICE_INTERFACE, "Trusted").arguments()[0]:
+                if properties.get("Trusted"):
                     logging.debug("DbusBroker.btDeviceAdded: already truested")
                 else:
                     logging.debug("DbusBroker.btDeviceAdded: trusting device")
-                    connection.call("Set", BT_DEVICE_INTERFACE, "Trusted", QDBusVariant(True)).arguments()
+                    self._send(device, DBUS_PROPERTIES_INTERFACE, "Set", BT_DEVICE_INTERFACE, "Trusted", QDBusVariant(True))
+                    # keep the cache in step until BlueZ's PropertiesChanged arrives
+                    properties["Trusted"] = True
                 if alias == WIRELESS_CONTROLLER:
                     # PS4 / PS5 and possibly others...
                     logging.debug("DbusBroker.btDeviceAdded: wireless controller detected, initiating pairing")
-                    connection = QDBusInterface(BT_SERVICE, device, BT_DEVICE_INTERFACE, self._bus, self)
-                    connection.call("Pair").arguments()
+                    self._send(device, BT_DEVICE_INTERFACE, "Pair")
                 elif alias == WII_CONTROLLER:
                     logging.debug("DbusBroker.btDeviceAdded: connecting to Wiimote")
-                    connection = QDBusInterface(BT_SERVICE, device, BT_DEVICE_INTERFACE, self._bus, self)
-                    connection.call("Connect").arguments()
+                    self._send(device, BT_DEVICE_INTERFACE, "Connect")
+
+    @pyqtSlot(QDBusMessage)
+    def btDeviceRemoved(self, message):
+        device = message.arguments()[0]
+        logging.debug("DbusBroker.btDeviceRemoved: releasing interfaces for %s", device)
+        if self.__devices.pop(device, None) is not None:
+            self.__gamingDevices = None
+        for key in [key for key in self.__interfaces if key[1] == device]:
+            del self.__interfaces[key]
 
     @pyqtSlot(QDBusMessage)
     def btPropertyChange(self, message):
-        path = message.path()
         args = message.arguments()
-        logging.debug("DbusBroker.btPropertyChange: property change: %s -> %s", path, args)
+        self.__pendingChanges.setdefault((message.path(), args[0]), {}).update(args[1])
+        if not self.__propertyChangeTimer.isActive():
+            self.__propertyChangeTimer.start()
+
+    def __processPropertyChanges(self):
+        changes = self.__pendingChanges
+        self.__pendingChanges = {}
+        logging.debug("DbusBroker.__processPropertyChanges: property changes: %s", changes)
+        for (path, interface), properties in changes.items():
+            if interface == BT_DEVICE_INTERFACE and path in self.__devices:
+                self.__devices[path].update(properties)
+                if "Alias" in properties or "Address" in properties:
+                    self.__gamingDevices = None
 
     @pyqtProperty(bool)
     def btDiscoverable(self) -> bool:
@@ -280,19 +360,41 @@ class DbusBroker(QObject):
     @pyqtSlot()
     def btStartDiscovery(self):
         logging.debug("DbusBroker.btStartDiscovery: starting")
-        connection = QDBusInterface(BT_SERVICE, self._adapterPath, BT_ADAPTER_INTERFACE, self._bus, self)
-        connection.call("StartDiscovery").arguments()
+        self._send(self._adapterPath, BT_ADAPTER_INTERFACE, "StartDiscovery")
 
-    @pyqtSlot(result=QVariant)
-    def getBtGamingDevices(self):
+    def __addDevices(self, managedObjects: dict):
+        for path, value in managedObjects.items():
+            # devices already seen via InterfacesAdded are more up to date
+            if BT_DEVICE_INTERFACE in value and path not in self.__devices:
+                self.__devices[path] = dict(value[BT_DEVICE_INTERFACE])
+                self.__gamingDevices = None
+
+    def __getGamingDevices(self) -> dict:
         devices = {}
-        connection = QDBusInterface(BT_SERVICE, "/", "org.freedesktop.DBus.ObjectManager", self._bus)
-        for _, value in connection.call("GetManagedObjects").arguments()[0].items():
-            if BT_DEVICE_INTERFACE in value:
-                if value[BT_DEVICE_INTERFACE]["Alias"] in CONTROLLERS:
-                    devices[value[BT_DEVICE_INTERFACE]["Address"]] = value[BT_DEVICE_INTERFACE]["Alias"]
+        for properties in self.__devices.values():
+            if properties.get("Alias") in CONTROLLERS:
+                devices[properties["Address"]] = properties["Alias"]
         return devices
 
+    def getBtDeviceAlias(self, device: str) -> str:
+        if device not in self.__devices or "Alias" not in self.__devices[device]:
+            # fetch (and cache) all of the device's properties in one call
+            properties = self._getInterface(device, DBUS_PROPERTIES_INTERFACE).call("GetAll", BT_DEVICE_INTERFACE).arguments()[0]
+            self.__devices.setdefault(device, {}).update(properties)
+            self.__gamingDevices = None
+        return self.__devices[device].get("Alias")
+
+    @pyqtSlot(result=QVariant)
+    def getBtGamingDevices(self):
+        # BlueZ devices belong to an adapter, so without one there is
+        # nothing to look up
+        if self._adapterPath is None:
+            return QVariant({})
+        if self.__gamingDevices is None:
+            # only converted when the device cache has changed
+            self.__gamingDevices = QVariant(self.__getGamingDevices())
+        return self.__gamingDevices
+
     @pyqtSlot(result=QVariant)
     def getTimezones(self):
         """